@@ -0,0 +1,233 @@
+"""Reading tables and query results as Arrow record batches."""
+
+import contextlib
+import functools
+import itertools
+import os
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator
+
+import pyarrow as pa
+from google.cloud import bigquery, bigquery_storage
+from pipeline import StageError, put_until_stopped
+from prefect_gcp import GcpCredentials
+
+BQ_EXPORT_BATCH_SIZE = 'BQ_EXPORT_BATCH_SIZE'
+BQ_EXPORT_STREAMS = 'BQ_EXPORT_STREAMS'
+
+if BQ_EXPORT_BATCH_SIZE in os.environ:
+    batch_size_default = int(os.environ.get(BQ_EXPORT_BATCH_SIZE))
+else:
+    batch_size_default = 100000
+
+if BQ_EXPORT_STREAMS in os.environ:
+    streams_default = int(os.environ.get(BQ_EXPORT_STREAMS))
+else:
+    streams_default = 4
+
+end_of_stream = object()
+
+
+def rebatch(
+    batches: Iterator[pa.RecordBatch],
+    batch_size: int,
+) -> Iterator[pa.RecordBatch]:
+    """Merge small record batches into batches of batch_size rows.
+
+    Yields:
+        Record batches of batch_size rows, the last one may be shorter.
+    """
+    pending: list[pa.RecordBatch] = []
+    pending_rows = 0
+    for batch in batches:
+        pending.append(batch)
+        pending_rows += batch.num_rows
+        if pending_rows >= batch_size:
+            table = pa.Table.from_batches(pending).combine_chunks()
+            full_rows = pending_rows - pending_rows % batch_size
+            yield from table.slice(0, full_rows).to_batches(batch_size)
+            pending = table.slice(full_rows).to_batches()
+            pending_rows -= full_rows
+    if pending_rows:
+        yield from pa.Table.from_batches(pending).combine_chunks().to_batches()
+
+
+def first_types(
+    row_batches: Iterator[list],
+    width: int,
+) -> tuple[list[pa.DataType], list[list]]:
+    """Find column types from the first non-null values of row batches.
+
+    Batches are read until every column has a value or the rows end, read
+    batches are returned to be converted with the found types. Columns
+    without any value have null type.
+    """
+    types = [pa.null() for _ in range(width)]
+    read_batches = []
+    for rows in row_batches:
+        read_batches.append(rows)
+        for index, column in enumerate(zip(*rows)):
+            if pa.types.is_null(types[index]):
+                types[index] = pa.array(column).type
+        if not any(pa.types.is_null(column_type) for column_type in types):
+            break
+    return types, read_batches
+
+
+def rows_to_batch(rows: list, schema: pa.Schema) -> pa.RecordBatch:
+    """Convert rows to record batch of schema."""
+    return pa.RecordBatch.from_arrays(
+        [
+            pa.array(column, type=column_field.type)
+            for column, column_field in zip(zip(*rows), schema)
+        ],
+        schema=schema,
+    )
+
+
+def typed_batches(cursor, batch_size: int) -> Iterator[pa.RecordBatch]:
+    """Fetch rows of executed DB-API cursor as batches of one schema."""
+    names = [column[0] for column in cursor.description]
+    row_batches = iter(functools.partial(cursor.fetchmany, batch_size), [])
+    types, read_batches = first_types(row_batches, len(names))
+    return map(
+        functools.partial(rows_to_batch, schema=pa.schema(zip(names, types))),
+        itertools.chain(read_batches, row_batches),
+    )
+
+
+class _StreamFanIn(object):
+    """Read streams of a read session in threads into one bounded queue."""
+
+    def __init__(self, read_client, session, queue_size: int) -> None:
+        self._read_client = read_client
+        self._session = session
+        self._batches: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._stop = threading.Event()
+        self._errors: list = []
+
+    def batches(self) -> Iterator[pa.RecordBatch]:
+        stream_names = [stream.name for stream in self._session.streams]
+        workers = max(len(stream_names), 1)
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for stream_name in stream_names:
+                pool.submit(self._read_stream, stream_name)
+            with contextlib.closing(self):
+                yield from self._drain(len(stream_names))
+        if self._errors:
+            raise StageError('Reading a stream failed') from self._errors[0]
+
+    def close(self) -> None:
+        self._stop.set()
+
+    def _read_stream(self, stream_name: str) -> None:
+        try:
+            self._put_pages(stream_name)
+        except Exception as error:  # noqa: B902
+            self._errors.append(error)
+        put_until_stopped(self._batches, end_of_stream, self._stop)
+
+    def _put_pages(self, stream_name: str) -> None:
+        reader = self._read_client.read_rows(stream_name)
+        for page in reader.rows(self._session).pages:
+            if not put_until_stopped(self._batches, page.to_arrow(), self._stop):
+                return
+
+    def _drain(self, streams: int) -> Iterator[pa.RecordBatch]:
+        finished = 0
+        while finished < streams:
+            batch = self._batches.get()
+            if batch is end_of_stream:
+                finished += 1
+            else:
+                yield batch
+
+
+class BigQueryArrowReader(object):
+    """Read tables and query results with BigQuery Storage Read API.
+
+    Data is read as Arrow record batches from several streams in parallel.
+    """
+
+    def __init__(self, gcp_credentials: GcpCredentials) -> None:
+        """Create BigQuery and BigQuery Storage clients."""
+        self._client = gcp_credentials.get_bigquery_client()
+        self._read_client = bigquery_storage.BigQueryReadClient(
+            credentials=gcp_credentials.get_credentials_from_service_account(),
+        )
+
+    def read_batches(
+        self,
+        table: str = '',
+        query: str = '',
+        batch_size: int = batch_size_default,
+        streams: int = streams_default,
+    ) -> Iterator[pa.RecordBatch]:
+        """Read table or query result in batches of batch_size rows.
+
+        Yields:
+            Record batches of batch_size rows, the last one may be shorter.
+        """
+        if query:
+            job = self._client.query(query)
+            job.result()
+            table_ref = job.destination
+        else:
+            table_ref = bigquery.TableReference.from_string(
+                table,
+                default_project=self._client.project,
+            )
+
+        session = self._read_client.create_read_session(
+            parent='projects/{p}'.format(p=self._client.project),
+            read_session=bigquery_storage.types.ReadSession(
+                table='projects/{p}/datasets/{d}/tables/{t}'.format(
+                    p=table_ref.project,
+                    d=table_ref.dataset_id,
+                    t=table_ref.table_id,
+                ),
+                data_format=bigquery_storage.types.DataFormat.ARROW,
+            ),
+            max_stream_count=streams,
+        )
+        fan_in = _StreamFanIn(self._read_client, session, streams * 2)
+        yield from rebatch(fan_in.batches(), batch_size)
+
+
+class DbApiArrowReader(object):
+    """Read tables and query results from DB-API connection as Arrow batches.
+
+    Local stand-in for BigQueryArrowReader, works with sqlite3 or duckdb
+    connections. Streams are not supported and ignored.
+    """
+
+    def __init__(self, connection) -> None:
+        """Remember DB-API connection."""
+        self._connection = connection
+
+    def read_batches(
+        self,
+        table: str = '',
+        query: str = '',
+        batch_size: int = batch_size_default,
+        streams: int = 1,
+    ) -> Iterator[pa.RecordBatch]:
+        """Read table or query result in batches of batch_size rows.
+
+        duckdb gives Arrow batches with the schema of the result, rows of
+        other connections are converted with types of their first values.
+        Older duckdb ignores the batch size it is asked for, so its batches
+        are merged and split again.
+
+        Yields:
+            Record batches of at most batch_size rows with the same schema.
+        """
+        with contextlib.closing(self._connection.cursor()) as cursor:
+            cursor.execute(query or 'SELECT * FROM {t}'.format(t=table))
+            fetch_record_batch = getattr(cursor, 'fetch_record_batch', None)
+            if fetch_record_batch:
+                yield from rebatch(fetch_record_batch(batch_size), batch_size)
+            else:
+                yield from typed_batches(cursor, batch_size)
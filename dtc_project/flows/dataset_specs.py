@@ -0,0 +1,93 @@
+"""Specs of data portal datasets ingested to datalake."""
+
+from ingest_spec import DatasetSpec, full_profile, month_granularity
+
+crimes_schema = {
+    'id': 'int64',
+    'case_number': 'string',
+    'date': 'datetime64[ns]',
+    'block': 'string',
+    'iucr': 'string',
+    'primary_type': 'string',
+    'description': 'string',
+    'location_description': 'string',
+    'arrest': 'bool',
+    'domestic': 'bool',
+    'beat': 'string',
+    'district': 'string',
+    'ward': 'string',
+    'community_area': 'string',
+    'fbi_code': 'string',
+    'x_coordinate': 'float64',
+    'y_coordinate': 'float64',
+    'year': 'int64',
+    'updated_on': 'datetime64[ns]',
+    'latitude': 'float64',
+    'longitude': 'float64',
+    'location': 'string',
+}
+crimes_profiles = {
+    full_profile: {
+        'select': [],
+        'where': '',
+    },
+    'street': {
+        'select': [
+            'id',
+            'date',
+            'primary_type',
+            'description',
+            'location_description',
+            'year',
+            'latitude',
+            'longitude',
+        ],
+        'where': ' and '.join([
+            "location_description = 'STREET'",
+            'latitude is not null',
+            'longitude is not null',
+            'latitude != 0',
+            'longitude != 0',
+        ]),
+    },
+}
+
+schools_schema = {
+    'the_geom': 'string',
+    'school_id': 'int64',
+    'short_name': 'string',
+    'address': 'string',
+    'grade_cat': 'string',
+    'lat': 'float64',
+    'long': 'float64',
+}
+
+crimes_spec = DatasetSpec(
+    name='crimes',
+    url_env='RAW_DATA_CRIMES_URL',
+    default_url='https://data.cityofchicago.org/resource/ijzp-q8t2.csv',
+    schema=crimes_schema,
+    gcs_path_env='GCS_BUCKET_CRIMES_PATH',
+    default_gcs_path='data/crimes/',
+    gcs_file_env='GCS_BUCKET_CRIMES_FILE_NAME',
+    default_gcs_file='chicago_crimes_',
+    partition_column='date',
+    partition_granularity=month_granularity,
+    required_columns=('latitude', 'longitude'),
+    fill_value='',
+    profiles=crimes_profiles,
+    spatial_columns=('longitude', 'latitude'),
+)
+
+schools_spec = DatasetSpec(
+    name='schools',
+    url_env='RAW_DATA_SCHOOLS_URL',
+    default_url='https://data.cityofchicago.org/resource/gqgn-ekwj.csv',
+    schema=schools_schema,
+    gcs_path_env='GCS_BUCKET_SCHOOLS_PATH',
+    default_gcs_path='data/',
+    gcs_file_env='GCS_BUCKET_SCHOOLS_FILE_NAME',
+    default_gcs_file='chicago_schools',
+)
+
+datasets = {spec.name: spec for spec in (crimes_spec, schools_spec)}
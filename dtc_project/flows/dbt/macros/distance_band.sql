@@ -0,0 +1,8 @@
+{% macro distance_band(distance) %}
+  CASE
+    WHEN {{ distance }} < 100 THEN '0-100 m'
+    WHEN {{ distance }} < 200 THEN '100-200 m'
+    WHEN {{ distance }} < 300 THEN '200-300 m'
+    ELSE '300-500 m'
+  END
+{% endmacro %}
@@ -0,0 +1,29 @@
+{{
+  config(
+    materialized="incremental",
+    incremental_strategy="insert_overwrite",
+    partition_by={"field": "crime_month", "data_type": "date", "granularity": "month"},
+    cluster_by=["primary_type", "grade_cat"],
+    tags=["dashboard"]
+  )
+}}
+
+SELECT
+  DATE_TRUNC(DATE(date), MONTH) AS crime_month,
+  primary_type,
+  grade_cat,
+  {{ distance_band("distance") }} AS distance_band,
+  COUNT(DISTINCT crime_id) AS crimes,
+  COUNT(DISTINCT school_id) AS schools
+FROM
+  {{ ref("crimes_around_schools") }}
+{% if is_incremental() %}
+-- only months of the last loaded year, backfills need run_dbt(full_refresh=True)
+WHERE
+  DATE_TRUNC(DATE(date), MONTH) >= (SELECT DATE_TRUNC(MAX(crime_month), YEAR) FROM {{ this }})
+{% endif %}
+GROUP BY
+  crime_month,
+  primary_type,
+  grade_cat,
+  distance_band
@@ -0,0 +1,32 @@
+{{
+  config(
+    materialized="incremental",
+    incremental_strategy="insert_overwrite",
+    partition_by={"field": "crime_month", "data_type": "date", "granularity": "month"},
+    cluster_by=["school_id", "primary_type"],
+    tags=["dashboard"]
+  )
+}}
+
+SELECT
+  DATE_TRUNC(DATE(date), MONTH) AS crime_month,
+  school_id,
+  short_name,
+  grade_cat,
+  primary_type,
+  {{ distance_band("distance") }} AS distance_band,
+  COUNT(*) AS crimes
+FROM
+  {{ ref("crimes_around_schools") }}
+{% if is_incremental() %}
+-- only months of the last loaded year, backfills need run_dbt(full_refresh=True)
+WHERE
+  DATE_TRUNC(DATE(date), MONTH) >= (SELECT DATE_TRUNC(MAX(crime_month), YEAR) FROM {{ this }})
+{% endif %}
+GROUP BY
+  crime_month,
+  school_id,
+  short_name,
+  grade_cat,
+  primary_type,
+  distance_band
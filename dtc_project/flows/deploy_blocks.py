@@ -19,6 +19,7 @@ DBT_CREDENTIAL_BLOCK_NAME = 'DBT_CREDENTIAL_BLOCK_NAME'
 DBT_JOB_ID = 'DBT_JOB_ID'
 DBT_JOB_BLOCK_NAME = 'DBT_JOB_BLOCK_NAME'
 BQ_BLOCK_NAME = 'BQ_BLOCK_NAME'
+BQ_FETCH_SIZE = 'BQ_FETCH_SIZE'
 
 
 @task(name='create GCP credentials block')
@@ -70,9 +71,13 @@ def create_bq_block() -> None:
     gcp_credentials = GcpCredentials.load(
         os.environ[GCP_CREDENTIAL_BLOCK_NAME],
     )
+    if BQ_FETCH_SIZE in os.environ:
+        fetch_size = int(os.environ.get(BQ_FETCH_SIZE))
+    else:
+        fetch_size = 10000
     BigQueryWarehouse(
         gcp_credentials=gcp_credentials,
-        fetch_size=1,
+        fetch_size=fetch_size,
     ).save(os.environ[BQ_BLOCK_NAME], overwrite=True)
     logger.info('INFO: finished ctreating BQ block')
 
@@ -3,10 +3,11 @@
 import datetime
 import os
 
+from export_from_bq import export_from_bq
 from extract_crimes_data import extract_crimes
 from extract_schools_data import extract_schools
 from load_data_to_bq import load_data_to_bq
-from prefect import flow, get_run_logger, task
+from prefect import Flow, flow, get_run_logger, task
 from prefect.deployments import Deployment
 from prefect.server.schemas.schedules import CronSchedule
 from prefect_gcp.cloud_storage import GcsBucket
@@ -107,11 +108,11 @@ def deploy_extract_schools() -> None:
     logger.info('INFO: Deploy extract schools deployment complete')
 
 
-@task(name='Deploy loading to BQ flow')
-def deploy_load_data_to_bq() -> None:
-    """Deploy load data to BQ flow."""
+@task(name='Deploy unscheduled flow')
+def deploy_unscheduled_flow(flow_to_deploy: Flow, name: str) -> None:
+    """Deploy flow run on demand with default parameters."""
     logger = get_run_logger()
-    logger.info('INFO: Starting deploy load data to BQ deployment')
+    logger.info('INFO: Starting deploy {n} deployment'.format(n=name))
 
     if GCS_DEV_BUCKET_NAME in os.environ:
         bucket_block = os.environ.get(GCS_DEV_BUCKET_NAME)
@@ -121,8 +122,8 @@ def deploy_load_data_to_bq() -> None:
     gsc_bucket = GcsBucket.load(bucket_block)
 
     deployment = Deployment.build_from_flow(
-        flow=load_data_to_bq,
-        name='load data to BQ',
+        flow=flow_to_deploy,
+        name=name,
         parameters={},
         infra_overrides={'env': {'PREFECT_LOGGING_LEVEL': 'DEBUG'}},
         work_queue_name='default',
@@ -130,7 +131,7 @@ def deploy_load_data_to_bq() -> None:
     )
 
     deployment.apply()
-    logger.info('INFO: Deploy load data to BQ deployment complete')
+    logger.info('INFO: Deploy {n} deployment complete'.format(n=name))
 
 
 @task(name='Deploy dbt cloud flow')
@@ -205,7 +206,8 @@ def deploy_flows() -> None:
     )
 
     deploy_extract_schools()
-    deploy_load_data_to_bq()
+    deploy_unscheduled_flow(load_data_to_bq, 'load data to BQ')
+    deploy_unscheduled_flow(export_from_bq, 'export data from BQ')
     deploy_dbt_cloud_run()
     deploy_dbt_run()
 
@@ -0,0 +1,133 @@
+"""Exporting tables and query results from datawarehouse to parquet files."""
+
+import contextlib
+import os
+import tempfile
+from typing import Iterator, Optional
+
+import arrow_readers
+import pyarrow as pa
+from prefect import flow, get_run_logger, task
+from prefect_gcp.bigquery import BigQueryWarehouse
+from prefect_gcp.cloud_storage import GcsBucket
+from pyarrow import parquet as pq
+
+GCP_PROJECT_ID = 'GCP_PROJECT_ID'
+BQ_BLOCK_NAME = 'BQ_BLOCK_NAME'
+BQ_PROD_DATASET_NAME = 'BQ_PROD_DATASET_NAME'
+GCS_BUCKET_BLOCK_NAME = 'GCS_BUCKET_BLOCK_NAME'
+
+if GCP_PROJECT_ID in os.environ:
+    gcp_project_name = os.environ.get(GCP_PROJECT_ID)
+else:
+    gcp_project_name = ''
+
+if BQ_BLOCK_NAME in os.environ:
+    bq_block_name = os.environ.get(BQ_BLOCK_NAME)
+else:
+    bq_block_name = 'chicago-warehouse'
+
+if BQ_PROD_DATASET_NAME in os.environ:
+    bq_prod_dataset_name = os.environ.get(BQ_PROD_DATASET_NAME)
+else:
+    bq_prod_dataset_name = 'chicago_prod'
+
+if GCS_BUCKET_BLOCK_NAME in os.environ:
+    bucket_block_name = os.environ.get(GCS_BUCKET_BLOCK_NAME)
+else:
+    bucket_block_name = 'chicago-gcs-bucket'
+
+table_default = 'crimes_around_schools'
+
+
+def write_batches(batches: Iterator[pa.RecordBatch], path: str) -> int:
+    """Write record batches to parquet file, one row group per batch."""
+    rows = 0
+    with contextlib.ExitStack() as stack:
+        writer: Optional[pq.ParquetWriter] = None
+        for batch in batches:
+            if writer is None:
+                writer = stack.enter_context(pq.ParquetWriter(path, batch.schema))
+            writer.write_table(pa.Table.from_batches([batch]).cast(writer.schema))
+            rows += batch.num_rows
+    return rows
+
+
+def export_to_parquet(
+    batches: Iterator[pa.RecordBatch],
+    to_path: str,
+    gcs_bucket: Optional[GcsBucket] = None,
+) -> int:
+    """Export record batches to local or bucket parquet file.
+
+    Returns number of exported rows.
+    """
+    if gcs_bucket is None:
+        return write_batches(batches, to_path)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        local_path = os.path.join(tmp_dir, 'export.parquet')
+        rows = write_batches(batches, local_path)
+        if rows:
+            gcs_bucket.upload_from_path(from_path=local_path, to_path=to_path)
+    return rows
+
+
+def source_arguments(source: str) -> dict:
+    """Tell table name from query, names have no whitespace."""
+    if source.split() == [source]:
+        return {'table': source}
+    return {'query': source}
+
+
+@task(name='Export BQ data to parquet')
+def export_bq_to_parquet(
+    to_path: str,
+    source: str,
+    to_bucket: bool,
+    batch_size: int,
+    streams: int,
+) -> int:
+    """Export table or query result from BQ to parquet file."""
+    logger = get_run_logger()
+    logger.info('INFO: Starting export to {p}'.format(p=to_path))
+
+    warehouse = BigQueryWarehouse.load(bq_block_name)
+    reader = arrow_readers.BigQueryArrowReader(warehouse.gcp_credentials)
+    batches = reader.read_batches(
+        batch_size=batch_size,
+        streams=streams,
+        **source_arguments(source),
+    )
+    gcs_bucket = GcsBucket.load(bucket_block_name) if to_bucket else None
+    rows = export_to_parquet(batches, to_path, gcs_bucket)
+
+    logger.info('INFO: Exported {r} rows to {p}'.format(r=rows, p=to_path))
+    return rows
+
+
+@flow(name='Export data from BQ')
+def export_from_bq(
+    to_path: str = 'data/export/crimes_around_schools.parquet',
+    source: str = '',
+    to_bucket: bool = True,
+    batch_size: int = arrow_readers.batch_size_default,
+    streams: int = arrow_readers.streams_default,
+) -> None:
+    """Export table or query result from BQ to local or bucket parquet file.
+
+    source is a table name or a query, without it crimes_around_schools
+    prod table is exported.
+    """
+    logger = get_run_logger()
+    logger.info('INFO: Starting export data from BQ')
+    if not source:
+        source = '{d}.{t}'.format(d=bq_prod_dataset_name, t=table_default)
+        if gcp_project_name:
+            source = '{p}.{t}'.format(p=gcp_project_name, t=source)
+    export_bq_to_parquet(to_path, source, to_bucket, batch_size, streams)
+    logger.info('INFO: Exporting data from BQ complete')
+
+
+if __name__ == '__main__':
+    export_from_bq()
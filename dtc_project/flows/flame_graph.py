@@ -0,0 +1,102 @@
+"""Formatting of sampled stacks as folded stacks and flame graph SVG."""
+
+import zlib
+from collections import Counter
+from html import escape
+
+top_frames = 20
+flame_width = 1200
+frame_height = 16
+min_frame_width = 0.5
+char_width = 7
+hue_base = 20
+hue_range = 40
+
+
+def folded_stacks(stacks: Counter) -> str:
+    """Format stacks in folded format used by flamegraph.pl and speedscope."""
+    return ''.join(
+        '{s} {c}\n'.format(s=stack, c=count)
+        for stack, count in sorted(stacks.items())
+    )
+
+
+def top_sampled(stacks: Counter) -> list[tuple[str, int]]:
+    """Count samples where frame is on top of the stack."""
+    top: Counter = Counter()
+    for stack, count in stacks.items():
+        top[stack.rsplit(';', 1)[-1]] += count
+    return top.most_common(top_frames)
+
+
+def _stack_tree(stacks: Counter) -> dict:
+    """Merge folded stacks into tree of frames with sample counts."""
+    root: dict = {'name': 'all', 'value': 0, 'children': {}}
+    for stack, count in stacks.items():
+        root['value'] += count
+        node = root
+        for name in stack.split(';'):
+            node = node['children'].setdefault(
+                name,
+                {'name': name, 'value': 0, 'children': {}},
+            )
+            node['value'] += count
+    return root
+
+
+def _tree_depth(node: dict) -> int:
+    return 1 + max(
+        (_tree_depth(child) for child in node['children'].values()),
+        default=0,
+    )
+
+
+class _FlameGraph(object):
+    """Render tree of frames as SVG rectangles, root at the bottom."""
+
+    def __init__(self, root: dict) -> None:
+        self.height = _tree_depth(root) * frame_height
+        self.rects: list[str] = []
+        self._scale = flame_width / root['value'] if root['value'] else 0
+
+    def render(self, node: dict, left: float, depth: int) -> None:
+        width = node['value'] * self._scale
+        if width < min_frame_width:
+            return
+        self.rects.append(self._rect(node, left, depth, width))
+        for child in node['children'].values():
+            self.render(child, left, depth + 1)
+            left += child['value'] * self._scale
+
+    def _rect(self, node: dict, left: float, depth: int, width: float) -> str:
+        top = self.height - (depth + 1) * frame_height
+        title = '{n} ({c} samples)'.format(n=node['name'], c=node['value'])
+        label = node['name'][:int(width / char_width)]
+        hue = hue_base + zlib.crc32(node['name'].encode()) % hue_range
+        return ''.join([
+            '<g><title>{t}</title>'.format(t=escape(title)),
+            '<rect x="{x:.1f}" y="{y}" width="{w:.1f}" height="{h}" '.format(
+                x=left, y=top, w=width, h=frame_height - 1,
+            ),
+            'fill="hsl({c},90%,60%)"/>'.format(c=hue),
+            '<text x="{x:.1f}" y="{y}">{l}</text></g>'.format(
+                x=left + 3, y=top + frame_height - 4, l=escape(label),
+            ),
+        ])
+
+
+def flame_graph(stacks: Counter) -> str:
+    """Render sampled stacks as flame graph SVG."""
+    root = _stack_tree(stacks)
+    graph = _FlameGraph(root)
+    if root['value']:
+        graph.render(root, 0, 0)
+    return ''.join([
+        '<svg xmlns="http://www.w3.org/2000/svg" width="{w}" height="{h}" '.format(
+            w=flame_width,
+            h=graph.height,
+        ),
+        'font-family="monospace" font-size="11">',
+        *graph.rects,
+        '</svg>',
+    ])
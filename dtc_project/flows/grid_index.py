@@ -0,0 +1,93 @@
+"""Haversine distances and a grid index of coordinates for radius queries."""
+
+import numpy as np
+
+earth_radius_m = 6371008.8
+meters_in_degree = earth_radius_m * np.radians(1)
+# projection to grid cells is exact only at the mean latitude of the points
+radius_margin = 1.01
+
+
+def haversine_m(
+    lat: float,
+    lon: float,
+    lats: np.ndarray,
+    lons: np.ndarray,
+) -> np.ndarray:
+    """Great-circle distances in meters from point to points."""
+    lat, lon = np.radians(lat), np.radians(lon)
+    lats, lons = np.radians(lats), np.radians(lons)
+    half_lat = np.sin((lats - lat) / 2)
+    half_lon = np.sin((lons - lon) / 2)
+    cos_product = np.cos(lat) * np.cos(lats)
+    chord = half_lat ** 2 + cos_product * half_lon ** 2
+    return 2 * earth_radius_m * np.arcsin(np.sqrt(chord))
+
+
+def _span(cells: np.ndarray) -> tuple[int, int]:
+    """Smallest cell and number of cells up to the largest one."""
+    if not cells.size:
+        return 0, 1
+    low = int(cells.min())
+    return low, int(cells.max()) - low + 1
+
+
+class GridIndex(object):
+    """Points bucketed into square cells, cells sorted by id."""
+
+    def __init__(
+        self,
+        lats: np.ndarray,
+        lons: np.ndarray,
+        cell_size: float,
+    ) -> None:
+        """Index points, cell_size is in meters."""
+        self.cell_size = cell_size
+        self._y_scale = meters_in_degree
+        mean_lat = np.mean(lats) if lats.size else 0
+        self._x_scale = meters_in_degree * np.cos(np.radians(mean_lat))
+        cells_x, cells_y = self._cells(lats, lons)
+        y_span = _span(cells_y)
+        self._x_min = _span(cells_x)[0]
+        self._y_min = y_span[0]
+        self._rows = y_span[1]
+        columns = cells_x - self._x_min
+        cell_ids = columns * self._rows + (cells_y - self._y_min)
+        self._order = np.argsort(cell_ids, kind='stable')
+        self._cell_ids = cell_ids[self._order]
+
+    def candidates(self, lat: float, lon: float, radius: float) -> np.ndarray:
+        """Positions of points in cells touching the circle."""
+        reach = radius * radius_margin
+        lat_reach = reach / self._y_scale
+        lon_reach = reach / self._x_scale
+        low = self._cells(lat - lat_reach, lon - lon_reach)
+        high = self._cells(lat + lat_reach, lon + lon_reach)
+        rows = self._row_range(low[1], high[1])
+        parts = [self._order[:0]]
+        for cell_x in range(low[0], high[0] + 1):
+            parts.append(self._column_positions(cell_x, rows))
+        return np.concatenate(parts)
+
+    def _cells(self, lats, lons) -> tuple:
+        x_meters = np.asarray(lons) * self._x_scale
+        y_meters = np.asarray(lats) * self._y_scale
+        cells_x = np.floor(x_meters / self.cell_size).astype(np.int64)
+        cells_y = np.floor(y_meters / self.cell_size).astype(np.int64)
+        return cells_x, cells_y
+
+    def _row_range(self, y_low: int, y_high: int) -> tuple[int, int]:
+        """Rows of the index between cells, empty when low is above high."""
+        low_row = max(y_low - self._y_min, 0)
+        high_row = min(y_high - self._y_min, self._rows - 1)
+        return low_row, high_row
+
+    def _column_positions(
+        self,
+        cell_x: int,
+        rows: tuple[int, int],
+    ) -> np.ndarray:
+        base = (cell_x - self._x_min) * self._rows
+        start = np.searchsorted(self._cell_ids, base + rows[0], 'left')
+        end = np.searchsorted(self._cell_ids, base + rows[1], 'right')
+        return self._order[start:max(start, end)]
@@ -0,0 +1,110 @@
+"""Ingesting Socrata datasets to datalake, driven by dataset specs.
+
+The same fetch, clean and write path is used for any dataset, in one of
+four modes: sequential tasks, streaming pipeline, staged Arrow files or
+concurrent shards planned by row counts.
+"""
+
+import contextlib
+import dataclasses
+from typing import Optional
+
+from ingest_pipelined import ingest_partition_pipelined, pipeline_workers
+from ingest_planned import ingest_year_planned
+from ingest_spec import DatasetSpec, dataset_partitions, full_profile
+from ingest_staged import ingest_partition_staged
+from ingest_tasks import ingest_partition
+from pipeline import worker_pool
+from portal_reader import transferred_key
+from prefect import get_run_logger
+from socrata import transferred_bytes
+
+
+@dataclasses.dataclass(frozen=True)
+class IngestOptions(object):
+    """How dataset is ingested, flags are flow parameters of the same name.
+
+    With planned=True years of partitioned dataset are fetched in shards
+    of equal row counts. With pipelined=True every partition is downloaded,
+    cleaned and uploaded by a streaming pipeline, with staged=True tasks
+    hand over Arrow IPC files instead of DataFrames. Otherwise three
+    sequential tasks are run. Only one of the modes can be set.
+    spatial_sort=True orders files of datasets with spatial_columns along
+    a Hilbert curve.
+    """
+
+    pipelined: bool = False
+    profile: str = full_profile
+    staged: bool = False
+    planned: bool = False
+    spatial_sort: bool = False
+
+    def __post_init__(self) -> None:
+        """Reject more than one ingest mode.
+
+        Raises:
+            ValueError: more than one of pipelined, staged, planned is set.
+        """
+        if sum((self.pipelined, self.staged, self.planned)) > 1:
+            raise ValueError(
+                'Only one of pipelined, staged and planned can be set',
+            )
+
+
+default_options = IngestOptions()
+
+
+def ingest_dataset(
+    spec: DatasetSpec,
+    years: Optional[list[int]] = None,
+    options: IngestOptions = default_options,
+) -> None:
+    """Ingest partitions of dataset for years, call it from a flow."""
+    logger = get_run_logger()
+    if options.spatial_sort and spec.spatial_columns:
+        spec = dataclasses.replace(spec, spatial_sort=True)
+    counter_key = transferred_key(spec, options.profile)
+    transferred_bytes.pop(counter_key, None)
+    if options.planned and spec.partition_granularity:
+        for year in years or []:
+            ingest_year_planned(spec, year, options.profile)
+    else:
+        ingest_partitions(spec, years or [], options)
+    logger.info('INFO: Downloaded {b} bytes of {n} with {p} profile'.format(
+        b=transferred_bytes[counter_key],
+        n=spec.name,
+        p=options.profile,
+    ))
+
+
+def ingest_partitions(
+    spec: DatasetSpec,
+    years: list[int],
+    options: IngestOptions,
+) -> None:
+    """Ingest partitions of dataset one by one.
+
+    Pipelined partitions share one pool of workers, spawning it for every
+    partition would take longer than cleaning a month of chunks.
+    """
+    logger = get_run_logger()
+    if options.pipelined:
+        pool_context = worker_pool(pipeline_workers)
+    else:
+        pool_context = contextlib.nullcontext()
+    with pool_context as pool:
+        for partition in dataset_partitions(spec, years):
+            logger.info('INFO: Starting ingesting {n}{s}'.format(
+                n=spec.name,
+                s=partition.suffix,
+            ))
+            if options.pipelined:
+                ingest_partition_pipelined(spec, partition, options.profile, pool)
+            elif options.staged:
+                ingest_partition_staged(spec, partition, options.profile)
+            else:
+                ingest_partition(spec, partition, options.profile)
+            logger.info('INFO: Ingesting {n}{s} complete'.format(
+                n=spec.name,
+                s=partition.suffix,
+            ))
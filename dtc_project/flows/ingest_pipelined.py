@@ -0,0 +1,85 @@
+"""Ingesting dataset partition as a streaming pipeline of chunks."""
+
+import contextlib
+import functools
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+import lake_writer
+from ingest_spec import DatasetSpec, Partition, full_profile, partition_url
+from pipeline import run_pipeline
+from portal_reader import clean_chunk, iter_chunks
+from prefect import get_run_logger, task
+from profiling import profiled
+from pyarrow import parquet as pq
+
+PIPELINE_QUEUE_SIZE = 'PIPELINE_QUEUE_SIZE'
+PIPELINE_WORKERS = 'PIPELINE_WORKERS'
+
+if PIPELINE_QUEUE_SIZE in os.environ:
+    pipeline_queue_size = int(os.environ.get(PIPELINE_QUEUE_SIZE))
+else:
+    pipeline_queue_size = 2
+
+if PIPELINE_WORKERS in os.environ:
+    pipeline_workers = int(os.environ.get(PIPELINE_WORKERS))
+else:
+    pipeline_workers = 2
+
+
+@task(name='Ingest dataset partition with pipeline')
+@profiled
+def ingest_partition_pipelined(
+    spec: DatasetSpec,
+    partition: Partition,
+    profile: str = full_profile,
+    pool: ProcessPoolExecutor | None = None,
+) -> int:
+    """Download, clean and upload partition as a streaming pipeline.
+
+    Download of the next chunk, cleaning in a process pool and parquet
+    encoding of the previous chunks run at the same time. The file is
+    uploaded to GCS once all chunks are encoded. Partitions of one run
+    share the worker pool, a pool is started for the partition without it.
+    Sampling profiles show the download and transform threads next to the
+    sink, cleaning in worker processes is not sampled.
+
+    A spatially ordered file is rewritten from the encoded one, which reads
+    the whole partition back into memory: Hilbert order is known only once
+    every row is downloaded, so chunks cannot be sorted while they stream.
+    """
+    logger = get_run_logger()
+    data_url = partition_url(spec, partition, profile)
+    logger.info('INFO: Download link {l}'.format(l=data_url))
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        sink = lake_writer.ParquetSink(os.path.join(tmp_dir, 'partition.parquet'))
+        with contextlib.closing(sink):
+            chunks = run_pipeline(
+                source=iter_chunks(data_url, spec, profile),
+                transform=functools.partial(clean_chunk, spec=spec),
+                sink=sink,
+                queue_size=pipeline_queue_size,
+                pool=pool,
+            )
+
+        if sink.rows:
+            parquet_path = sink.path
+            if spec.spatial_sort:
+                parquet_path = os.path.join(tmp_dir, 'sorted.parquet')
+                lake_writer.write_partition_parquet(
+                    pq.read_table(sink.path),
+                    parquet_path,
+                    spec,
+                )
+            lake_writer.datalake_bucket().upload_from_path(
+                from_path=parquet_path,
+                to_path=lake_writer.gcs_path(spec, partition, profile),
+            )
+
+    logger.info('INFO: {r} rows in {c} chunks passed through pipeline'.format(
+        r=sink.rows,
+        c=chunks,
+    ))
+    return sink.rows
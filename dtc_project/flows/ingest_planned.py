@@ -0,0 +1,179 @@
+"""Ingesting years of dataset in concurrent shards planned by row counts.
+
+Every shard stages its rows split by partition and returns only the
+staged names. A partition is cleaned and written as soon as the shards
+covering it are downloaded, so at most one partition is held in memory.
+"""
+
+import os
+from collections import defaultdict
+
+import ingest_spec
+import pandas as pd
+import staging
+from ingest_staged import stage_name
+from ingest_tasks import clean_partition, write_partition_to_gcs
+from portal_reader import read_url
+from prefect import get_run_logger, task
+from profiling import profiled
+from shard_planner import Shard, plan_shards, read_day_counts
+from socrata import build_url, open_url
+
+SHARD_TARGET_ROWS = 'SHARD_TARGET_ROWS'
+
+if SHARD_TARGET_ROWS in os.environ:
+    shard_target_rows = int(os.environ.get(SHARD_TARGET_ROWS))
+else:
+    shard_target_rows = 50000
+
+
+def count_url(spec: ingest_spec.DatasetSpec, year: int, profile: str) -> str:
+    """Build data portal link with number of rows by day for year."""
+    column = spec.partition_column
+    year_partition = ingest_spec.Partition(
+        start='{y}-01-01T00:00:00'.format(y=year),
+        end='{y}-12-31T23:59:59'.format(y=year),
+    )
+    return build_url(
+        ingest_spec.dataset_url(spec),
+        where=ingest_spec.partition_where(spec, year_partition, profile),
+        select=['date_trunc_ymd({c}) as day'.format(c=column), 'count(*) as n'],
+        group='date_trunc_ymd({c})'.format(c=column),
+        limit=spec.page_limit,
+    )
+
+
+@task(name='Plan dataset shards')
+def plan_year_shards(
+    spec: ingest_spec.DatasetSpec,
+    year: int,
+    profile: str = ingest_spec.full_profile,
+) -> list[Shard]:
+    """Ask data portal for number of rows by day and plan shards of year.
+
+    The answer is not counted as transferred data of the dataset.
+    """
+    logger = get_run_logger()
+    data_url = count_url(spec, year, profile)
+    logger.info('INFO: Count link {l}'.format(l=data_url))
+    with open_url(data_url) as stream:
+        day_counts = read_day_counts(pd.read_csv(stream))
+    shards = plan_shards(
+        day_counts,
+        [year],
+        min(shard_target_rows, spec.page_limit),
+    )
+    logger.info('INFO: Planned {s} shards for {r} rows of {n} in {y}'.format(
+        s=len(shards),
+        r=sum(day_counts.values()),
+        n=spec.name,
+        y=year,
+    ))
+    return shards
+
+
+def _download_pages(
+    spec: ingest_spec.DatasetSpec,
+    shard: Shard,
+    profile: str,
+) -> pd.DataFrame:
+    """Extract row data of shard, in pages ordered by row id."""
+    shard_partition = ingest_spec.Partition(start=shard.start, end=shard.end)
+    pages = []
+    offset = 0
+    while True:
+        data_url = build_url(
+            ingest_spec.dataset_url(spec),
+            where=ingest_spec.partition_where(spec, shard_partition, profile),
+            select=spec.profiles[profile]['select'],
+            limit=spec.page_limit,
+            order=':id',
+            offset=offset,
+        )
+        page = read_url(data_url, spec, profile)
+        pages.append(page)
+        if len(page) < spec.page_limit:
+            return pd.concat(pages, ignore_index=True)
+        offset += spec.page_limit
+
+
+def partition_rows(
+    df: pd.DataFrame,
+    spec: ingest_spec.DatasetSpec,
+    partition: ingest_spec.Partition,
+) -> pd.DataFrame:
+    """Select rows of partition, the end second of partition is included."""
+    if df.empty:
+        return df
+    start = pd.Timestamp(partition.start)
+    end = pd.Timestamp(partition.end) + pd.Timedelta(seconds=1)
+    dates = pd.to_datetime(df[spec.partition_column])
+    return df[dates.between(start, end, inclusive='left')]
+
+
+@task(name='Download dataset shard', tags=['socrata'])
+@profiled
+def download_shard(
+    spec: ingest_spec.DatasetSpec,
+    shard: Shard,
+    profile: str = ingest_spec.full_profile,
+) -> dict[str, str]:
+    """Download shard and stage its rows by partition.
+
+    Returns names of staged files by partition suffix.
+    """
+    df = _download_pages(spec, shard, profile)
+    shard_stage = 'shard{d}'.format(d=shard.start[:10])
+    staged_names = {}
+    year = int(shard.start[:4])
+    for partition in ingest_spec.dataset_partitions(spec, [year]):
+        rows = partition_rows(df, spec, partition)
+        if not rows.empty:
+            name = stage_name(spec, shard_stage, partition, profile)
+            staging.StagedFile(name).write_dataframe(rows)
+            staged_names[partition.suffix] = name
+    return staged_names
+
+
+def _ingest_staged_rows(
+    spec: ingest_spec.DatasetSpec,
+    partition: ingest_spec.Partition,
+    profile: str,
+    staged_names: dict[str, list[str]],
+) -> None:
+    """Clean and write partition from rows staged by shards, drop them."""
+    staged_files = [
+        staging.StagedFile(name)
+        for name in staged_names.pop(partition.suffix, [])
+    ]
+    if staged_files:
+        row_df = pd.concat(
+            [staging.load_staged(staged.path) for staged in staged_files],
+            ignore_index=True,
+        )
+        clean_df = clean_partition(row_df, spec)
+        write_partition_to_gcs(clean_df, spec, partition, profile)
+    for staged_file in staged_files:
+        staged_file.remove()
+
+
+def ingest_year_planned(
+    spec: ingest_spec.DatasetSpec,
+    year: int,
+    profile: str,
+) -> None:
+    """Ingest year of dataset in shards planned by row counts.
+
+    Shards are downloaded concurrently and cover every day of the year in
+    order, a partition is complete once a shard ending at or after its end
+    is downloaded. Files in datalake are the same as without planning.
+    """
+    shards = plan_year_shards(spec, year, profile)
+    futures = [download_shard.submit(spec, shard, profile) for shard in shards]
+    partitions = ingest_spec.dataset_partitions(spec, [year])
+    staged_names = defaultdict(list)
+    for shard, future in zip(shards, futures):
+        for suffix, name in future.result().items():
+            staged_names[suffix].append(name)
+        while partitions and partitions[0].end <= shard.end:
+            _ingest_staged_rows(spec, partitions.pop(0), profile, staged_names)
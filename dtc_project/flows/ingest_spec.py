@@ -0,0 +1,128 @@
+"""Dataset specs and time partitions of Socrata datasets.
+
+Every dataset is described by a DatasetSpec: resource URL, schema, time
+partition column and granularity, cleaning rules and ingest profiles.
+"""
+
+import calendar
+import os
+from dataclasses import dataclass, field
+from typing import Optional
+
+from socrata import build_url
+
+full_profile = 'full'
+month_granularity = 'month'
+year_granularity = 'year'
+months_in_year = 12
+
+
+def _full_profiles() -> dict:
+    return {full_profile: {'select': [], 'where': ''}}
+
+
+@dataclass(frozen=True)
+class DatasetSpec(object):
+    """Socrata dataset and rules for its ingestion.
+
+    Without partition_granularity the whole dataset is one partition.
+    Rows with nulls in required_columns are dropped, other nulls are
+    replaced with fill_value when it is set. Profiles map profile name to
+    SoQL 'select' column list and 'where' row filter. spatial_columns
+    name longitude and latitude columns, with spatial_sort=True files are
+    ordered along a Hilbert curve of them.
+    """
+
+    name: str
+    url_env: str
+    default_url: str
+    schema: dict
+    gcs_path_env: str
+    default_gcs_path: str
+    gcs_file_env: str
+    default_gcs_file: str
+    partition_column: str = ''
+    partition_granularity: str = ''
+    required_columns: tuple = ()
+    fill_value: Optional[str] = None
+    profiles: dict = field(default_factory=_full_profiles)
+    page_limit: int = 100000
+    spatial_columns: tuple = ()
+    spatial_sort: bool = False
+
+
+@dataclass(frozen=True)
+class Partition(object):
+    """Time range of a dataset written to one parquet file.
+
+    suffix is added to file and staged names, e.g. '_2022_01'.
+    """
+
+    start: str = ''
+    end: str = ''
+    suffix: str = ''
+
+
+def dataset_url(spec: DatasetSpec) -> str:
+    """Get resource link of dataset."""
+    if spec.url_env in os.environ:
+        return os.environ.get(spec.url_env)
+    return spec.default_url
+
+
+def dataset_partitions(spec: DatasetSpec, years: list[int]) -> list[Partition]:
+    """Split requested years into partitions of dataset."""
+    if spec.partition_granularity == year_granularity:
+        return [
+            Partition(
+                start='{y}-01-01T00:00:00'.format(y=year),
+                end='{y}-12-31T23:59:59'.format(y=year),
+                suffix='_{y}'.format(y=year),
+            )
+            for year in years
+        ]
+    if spec.partition_granularity == month_granularity:
+        return [
+            Partition(
+                start='{y}-{m:02d}-01T00:00:00'.format(y=year, m=month),
+                end='{y}-{m:02d}-{d:02d}T23:59:59'.format(
+                    y=year,
+                    m=month,
+                    d=calendar.monthrange(year, month)[1],
+                ),
+                suffix='_{y}_{m:02d}'.format(y=year, m=month),
+            )
+            for year in years
+            for month in range(1, months_in_year + 1)
+        ]
+    return [Partition()]
+
+
+def partition_where(spec: DatasetSpec, partition: Partition, profile: str) -> str:
+    """Build SoQL row filter for partition and ingest profile."""
+    filters = []
+    if partition.start:
+        filters.append("{c} between '{s}' and '{e}'".format(
+            c=spec.partition_column,
+            s=partition.start,
+            e=partition.end,
+        ))
+    if spec.profiles[profile]['where']:
+        filters.append(spec.profiles[profile]['where'])
+    return ' and '.join(filters)
+
+
+def partition_url(spec: DatasetSpec, partition: Partition, profile: str) -> str:
+    """Build data portal link with data of partition.
+
+    Columns and row filters of the ingest profile are applied by the portal,
+    so data dropped later in staging is not downloaded. Rows are ordered by
+    row id, so a body that breaks can be continued from a new request.
+    """
+    return build_url(
+        dataset_url(spec),
+        where=partition_where(spec, partition, profile),
+        select=spec.profiles[profile]['select'],
+        order=':id',
+        limit=spec.page_limit,
+    )
@@ -0,0 +1,103 @@
+"""Ingesting dataset partition with tasks handing over staged Arrow files."""
+
+import os
+import tempfile
+
+import lake_writer
+import staging
+from ingest_spec import DatasetSpec, Partition, full_profile
+from ingest_tasks import clean_partition, download_partition
+from prefect import get_run_logger, task
+from profiling import profiled
+
+
+def stage_name(
+    spec: DatasetSpec,
+    stage: str,
+    partition: Partition,
+    profile: str,
+) -> str:
+    """Name staged file of stage for partition."""
+    return '{n}_{s}_{p}{x}'.format(
+        n=spec.name,
+        s=stage,
+        p=profile,
+        x=partition.suffix,
+    )
+
+
+@task(name='Stage dataset partition')
+def stage_partition(
+    spec: DatasetSpec,
+    partition: Partition,
+    profile: str = full_profile,
+) -> str:
+    """Download row data to staging area, reuse it if already staged."""
+    logger = get_run_logger()
+    staged = staging.StagedFile(stage_name(spec, 'raw', partition, profile))
+    if staged.is_fresh():
+        logger.info('INFO: Reusing staged row data {p}'.format(p=staged.path))
+        return staged.path
+    return staged.write_dataframe(download_partition.fn(spec, partition, profile))
+
+
+@task(name='Clean staged dataset partition')
+def clean_staged_partition(
+    path: str,
+    spec: DatasetSpec,
+    partition: Partition,
+    profile: str = full_profile,
+) -> str:
+    """Clean memory-mapped row data and stage the result."""
+    logger = get_run_logger()
+    staged = staging.StagedFile(stage_name(spec, 'clean', partition, profile), path)
+    if staged.is_fresh():
+        logger.info('INFO: Reusing staged clean data {p}'.format(p=staged.path))
+        return staged.path
+    clean_df = clean_partition.fn(staging.load_staged(path), spec)
+    return staged.write_dataframe(clean_df)
+
+
+@task(name='Write staged dataset partition to GCS')
+@profiled
+def write_staged_partition_to_gcs(
+    path: str,
+    spec: DatasetSpec,
+    partition: Partition,
+    profile: str = full_profile,
+) -> None:
+    """Write staged clean data to GCS and drop staged files of partition."""
+    to_path = lake_writer.gcs_path(spec, partition, profile)
+    logger = get_run_logger()
+    logger.info('INFO: Starting upload staged data to GCS {p}'.format(p=to_path))
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        parquet_path = os.path.join(tmp_dir, 'partition.parquet')
+        if spec.spatial_sort:
+            lake_writer.write_partition_parquet(
+                staging.load_staged_table(path),
+                parquet_path,
+                spec,
+            )
+        else:
+            staging.write_staged_parquet(path, parquet_path)
+        lake_writer.datalake_bucket().upload_from_path(
+            from_path=parquet_path,
+            to_path=to_path,
+        )
+    staging.StagedFile(stage_name(spec, 'clean', partition, profile)).remove()
+    staging.StagedFile(stage_name(spec, 'raw', partition, profile)).remove()
+    logger.info('INFO: Upload staged data to GCS {p} complete'.format(p=to_path))
+
+
+def ingest_partition_staged(
+    spec: DatasetSpec,
+    partition: Partition,
+    profile: str,
+) -> None:
+    """Ingest partition passing staged file paths between tasks."""
+    raw_path = stage_partition(spec, partition, profile)
+    if staging.staged_rows(raw_path):
+        clean_path = clean_staged_partition(raw_path, spec, partition, profile)
+        write_staged_partition_to_gcs(clean_path, spec, partition, profile)
+    else:
+        staging.StagedFile(stage_name(spec, 'raw', partition, profile)).remove()
@@ -0,0 +1,75 @@
+"""Tasks downloading, cleaning and writing one dataset partition."""
+
+import os
+import tempfile
+
+import pandas as pd
+import pyarrow as pa
+from ingest_spec import DatasetSpec, Partition, full_profile, partition_url
+from lake_writer import datalake_bucket, gcs_path, write_partition_parquet
+from portal_reader import clean_chunk, read_url
+from prefect import get_run_logger, task
+from prefect_gcp.cloud_storage import DataFrameSerializationFormat
+from profiling import profiled
+
+
+@task(name='Download dataset partition')
+@profiled
+def download_partition(
+    spec: DatasetSpec,
+    partition: Partition,
+    profile: str = full_profile,
+) -> pd.DataFrame:
+    """Extract row data of partition from data portal."""
+    return read_url(partition_url(spec, partition, profile), spec, profile)
+
+
+@task(name='Clean dataset partition')
+@profiled
+def clean_partition(df: pd.DataFrame, spec: DatasetSpec) -> pd.DataFrame:
+    """Clean row data and apply schema."""
+    logger = get_run_logger()
+    logger.info('INFO: Starting cleaning {n} data'.format(n=spec.name))
+    df = clean_chunk(df, spec)
+    logger.info('INFO: Finishing cleaning {n} data'.format(n=spec.name))
+    return df
+
+
+@task(name='Write dataset partition to GCS')
+@profiled
+def write_partition_to_gcs(
+    df: pd.DataFrame,
+    spec: DatasetSpec,
+    partition: Partition,
+    profile: str = full_profile,
+) -> None:
+    """Write partition data to GCS bucket in parquet format."""
+    to_path = gcs_path(spec, partition, profile)
+    logger = get_run_logger()
+    logger.info('INFO: Starting upload to GCS {p}'.format(p=to_path))
+
+    gcs_bucket = datalake_bucket()
+    if spec.spatial_sort:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            parquet_path = os.path.join(tmp_dir, 'partition.parquet')
+            write_partition_parquet(pa.Table.from_pandas(df), parquet_path, spec)
+            gcs_bucket.upload_from_path(from_path=parquet_path, to_path=to_path)
+    else:
+        gcs_bucket.upload_from_dataframe(
+            df=df,
+            to_path=to_path,
+            serialization_format=DataFrameSerializationFormat.PARQUET,
+        )
+    logger.info('INFO: Upload to GCS {p} complete'.format(p=to_path))
+
+
+def ingest_partition(
+    spec: DatasetSpec,
+    partition: Partition,
+    profile: str,
+) -> None:
+    """Ingest partition with sequential download, clean and write tasks."""
+    row_df = download_partition(spec, partition, profile)
+    if not row_df.empty:
+        clean_df = clean_partition(row_df, spec)
+        write_partition_to_gcs(clean_df, spec, partition, profile)
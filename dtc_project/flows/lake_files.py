@@ -0,0 +1,163 @@
+"""Reading datalake files and caching values built from them.
+
+Files are read from a local copy of the datalake or from the GCS bucket.
+Cached values are dropped once the version of their file changes: the
+modification time of a local file or the generation of a bucket object.
+"""
+
+import dataclasses
+import os
+import posixpath
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Optional
+
+import pyarrow as pa
+from lake_writer import bucket_block
+from prefect_gcp.cloud_storage import GcsBucket
+from pyarrow import parquet as pq
+
+LAKE_CACHE_FILES = 'LAKE_CACHE_FILES'
+LAKE_CACHE_CHECK_SECONDS = 'LAKE_CACHE_CHECK_SECONDS'
+
+if LAKE_CACHE_FILES in os.environ:
+    cache_files = int(os.environ.get(LAKE_CACHE_FILES))
+else:
+    cache_files = 25
+
+if LAKE_CACHE_CHECK_SECONDS in os.environ:
+    cache_check_seconds = float(os.environ.get(LAKE_CACHE_CHECK_SECONDS))
+else:
+    cache_check_seconds = 60
+
+
+def _read_columns(path: str, columns: tuple) -> pa.Table:
+    names = set(pq.read_schema(path).names)
+    return pq.read_table(path, columns=[name for name in columns if name in names])
+
+
+class LocalFiles(object):
+    """Datalake files in a local folder with the bucket layout."""
+
+    def __init__(self, root: str) -> None:
+        """Files are read from root joined with their bucket path."""
+        self.root = root
+
+    def version(self, path: str) -> Optional[int]:
+        """Get modification time of file, None when it does not exist."""
+        try:
+            return os.stat(os.path.join(self.root, path)).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def read(self, path: str, columns: tuple) -> pa.Table:
+        """Read present columns of file."""
+        return _read_columns(os.path.join(self.root, path), columns)
+
+
+class BucketFiles(object):
+    """Datalake files in GCS bucket, downloaded when read."""
+
+    def __init__(self, block_name: str) -> None:
+        """Load bucket block."""
+        self.bucket = GcsBucket.load(block_name)
+
+    def version(self, path: str) -> Optional[int]:
+        """Get generation of bucket object, None when it does not exist."""
+        for blob in self.bucket.list_blobs(posixpath.dirname(path)):
+            if blob.name.endswith(path):
+                return blob.generation
+        return None
+
+    def read(self, path: str, columns: tuple) -> pa.Table:
+        """Download and read present columns."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            local_path = os.path.join(tmp_dir, posixpath.basename(path))
+            self.bucket.download_object_to_path(path, local_path)
+            return _read_columns(local_path, columns)
+
+
+def lake_files(root: str = '', block_name: str = ''):
+    """Local folder files when root is set, otherwise bucket files."""
+    if root:
+        return LocalFiles(root)
+    return BucketFiles(block_name or bucket_block())
+
+
+@dataclasses.dataclass
+class CacheEntry(object):
+    """Value built from a version of file, checked at monotonic time."""
+
+    version: int
+    checked: float
+    cached: Any
+
+
+class FileCache(object):
+    """LRU cache of values built from datalake files.
+
+    Version of a cached file is checked again after check_seconds, a
+    changed file is read again. Values of missing files are not cached, so
+    the files are read as soon as they are written.
+    """
+
+    def __init__(
+        self,
+        files,
+        max_files: int = cache_files,
+        check_seconds: float = cache_check_seconds,
+    ) -> None:
+        """Cache values of LocalFiles or BucketFiles."""
+        self.files = files
+        self.max_files = max_files
+        self.check_seconds = check_seconds
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(
+        self,
+        path: str,
+        columns: tuple,
+        build: Callable[[Optional[pa.Table]], Any],
+    ) -> Any:
+        """Get value built from columns of file, or from None when it is missing."""
+        now = time.monotonic()
+        entry = self._entry(path)
+        if entry is not None and now - entry.checked < self.check_seconds:
+            return self._hit(entry)
+        version = self.files.version(path)
+        if version is None:
+            self._miss(path, None)
+            return build(None)
+        if entry is not None and entry.version == version:
+            entry.checked = now
+            return self._hit(entry)
+        built = build(self.files.read(path, columns))
+        self._miss(path, CacheEntry(version, now, built))
+        return built
+
+    def _entry(self, path: str) -> Optional[CacheEntry]:
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None:
+                self._entries.move_to_end(path)
+            return entry
+
+    def _hit(self, entry: CacheEntry) -> Any:
+        with self._lock:
+            self.hits += 1
+        return entry.cached
+
+    def _miss(self, path: str, entry: Optional[CacheEntry]) -> None:
+        """Cache new entry of file, drop cached one when entry is None."""
+        with self._lock:
+            self.misses += 1
+            self._entries.pop(path, None)
+            if entry is not None:
+                self._entries[path] = entry
+            while len(self._entries) > self.max_files:
+                self._entries.popitem(last=False)
@@ -0,0 +1,226 @@
+"""Low-latency queries over crimes and schools files in the datalake.
+
+Month partitions of crimes are read on demand from the parquet files
+written by the extract flows and kept in a file cache with a grid index
+of coordinates. Radius, k-nearest school and date range queries are
+answered from memory with haversine distances.
+"""
+
+import functools
+import os
+from typing import NamedTuple, Optional
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+from dataset_specs import crimes_spec, schools_spec
+from grid_index import GridIndex, haversine_m
+from ingest_spec import Partition, dataset_partitions, full_profile
+from lake_files import FileCache
+from lake_writer import gcs_path
+
+LAKE_GRID_CELL_SIZE = 'LAKE_GRID_CELL_SIZE'
+
+if LAKE_GRID_CELL_SIZE in os.environ:
+    grid_cell_size = float(os.environ.get(LAKE_GRID_CELL_SIZE))
+else:
+    grid_cell_size = 250
+
+crime_columns = (
+    'id',
+    'date',
+    'primary_type',
+    'description',
+    'location_description',
+    'latitude',
+    'longitude',
+)
+school_columns = ('school_id', 'short_name', 'address', 'grade_cat', 'lat', 'long')
+
+
+class Circle(NamedTuple):
+    """Point and radius in meters around it."""
+
+    lat: float
+    lon: float
+    radius: float
+
+
+def _to_pandas(table: Optional[pa.Table], columns: tuple) -> pd.DataFrame:
+    if table is None:
+        return pd.DataFrame({column: [] for column in columns}).astype(
+            {'date': 'datetime64[ns]'} if 'date' in columns else {},
+        )
+    return table.to_pandas()
+
+
+def _overlaps(partition: Partition, start: pd.Timestamp, end: pd.Timestamp) -> bool:
+    starts_before_end = pd.Timestamp(partition.start) <= end
+    return starts_before_end and pd.Timestamp(partition.end) >= start
+
+
+def months_between(start: pd.Timestamp, end: pd.Timestamp) -> list[Partition]:
+    """Month partitions of crimes overlapping the time range."""
+    years = list(range(start.year, end.year + 1))
+    return [
+        partition
+        for partition in dataset_partitions(crimes_spec, years)
+        if _overlaps(partition, start, end)
+    ]
+
+
+class CrimesPartition(object):
+    """Crimes of one month with grid index of their coordinates."""
+
+    def __init__(self, df: pd.DataFrame, cell_size: float) -> None:
+        """Index crimes with coordinates."""
+        df = df.dropna(subset=['latitude', 'longitude'])
+        self.df = df.reset_index(drop=True)
+        self.lats = self.df['latitude'].to_numpy(dtype=np.float64)
+        self.lons = self.df['longitude'].to_numpy(dtype=np.float64)
+        self.dates = self.df['date'].to_numpy(dtype='datetime64[ns]')
+        self.index = GridIndex(self.lats, self.lons, cell_size)
+
+    def query(
+        self,
+        start: pd.Timestamp,
+        end: pd.Timestamp,
+        circle: Optional[Circle] = None,
+    ) -> pd.DataFrame:
+        """Crimes between times, within circle if it is given."""
+        if circle is None:
+            positions = np.arange(len(self.df))
+        else:
+            positions = self.index.candidates(*circle)
+        dates = self.dates[positions]
+        positions = positions[np.logical_and(
+            dates >= start.to_datetime64(),
+            dates <= end.to_datetime64(),
+        )]
+        found = self.df.iloc[positions]
+        if circle is None:
+            return found
+        distances = haversine_m(
+            circle.lat,
+            circle.lon,
+            self.lats[positions],
+            self.lons[positions],
+        )
+        within = distances <= circle.radius
+        return found[within].assign(distance_m=distances[within])
+
+
+def _index_crimes(table: Optional[pa.Table], cell_size: float) -> CrimesPartition:
+    return CrimesPartition(_to_pandas(table, crime_columns), cell_size)
+
+
+class Lake(object):
+    """Query API over crimes and schools files of the datalake.
+
+    Files are kept in the file cache, a file that changed or was written
+    since it was missing is read again.
+    """
+
+    def __init__(
+        self,
+        cache: FileCache,
+        profile: str = full_profile,
+        cell_size: float = grid_cell_size,
+    ) -> None:
+        """Read crimes files of ingest profile through the cache."""
+        self.cache = cache
+        self.profile = profile
+        self.cell_size = cell_size
+
+    @property
+    def schools(self) -> pd.DataFrame:
+        """All schools, empty when the file is not written yet."""
+        return self.cache.get(
+            gcs_path(schools_spec, Partition(), full_profile),
+            school_columns,
+            functools.partial(_to_pandas, columns=school_columns),
+        )
+
+    def school(self, school_id: int) -> pd.Series:
+        """Get school by id.
+
+        Raises:
+            LookupError: school is unknown.
+        """
+        schools = self.schools
+        found = schools[schools['school_id'] == school_id]
+        if found.empty:
+            raise LookupError('Unknown school {s}'.format(s=school_id))
+        return found.iloc[0]
+
+    def nearest_schools(
+        self,
+        lat: float,
+        lon: float,
+        count: int = 5,
+    ) -> pd.DataFrame:
+        """Get count schools nearest to point with distances."""
+        schools = self.schools
+        count = min(count, len(schools))
+        if count < 1:
+            return schools.iloc[:0]
+        distances = haversine_m(
+            lat,
+            lon,
+            schools['lat'].to_numpy(dtype=np.float64),
+            schools['long'].to_numpy(dtype=np.float64),
+        )
+        nearest = np.argpartition(distances, count - 1)[:count]
+        nearest = nearest[np.argsort(distances[nearest])]
+        return schools.iloc[nearest].assign(distance_m=distances[nearest])
+
+    def crimes(
+        self,
+        days: tuple[str, str],
+        circle: Optional[Circle] = None,
+        location_description: str = '',
+    ) -> pd.DataFrame:
+        """Crimes between first and last day, within circle if it is given.
+
+        Without circle every crime of the days is returned, with circle the
+        nearest crimes go first.
+        """
+        start = pd.Timestamp(days[0])
+        next_day = pd.Timestamp(days[1]) + pd.Timedelta(days=1)
+        end = next_day - pd.Timedelta(1)
+        partitions = [
+            self.partition(partition)
+            for partition in months_between(start, end)
+        ]
+        if not partitions:
+            partitions = [_index_crimes(None, self.cell_size)]
+        found = [month.query(start, end, circle) for month in partitions]
+        crimes = pd.concat(
+            [df for df in found if not df.empty] or found,
+            ignore_index=True,
+        )
+        if location_description:
+            crimes = crimes[crimes['location_description'] == location_description]
+        if circle is not None:
+            return crimes.sort_values('distance_m', ignore_index=True)
+        return crimes
+
+    def crimes_near_school(
+        self,
+        school_id: int,
+        radius: float,
+        days: tuple[str, str],
+        location_description: str = '',
+    ) -> pd.DataFrame:
+        """Crimes within radius of school between first and last day."""
+        school = self.school(school_id)
+        circle = Circle(school['lat'], school['long'], radius)
+        return self.crimes(days, circle, location_description)
+
+    def partition(self, partition: Partition) -> CrimesPartition:
+        """Get month of crimes from cache, read it on a miss."""
+        return self.cache.get(
+            gcs_path(crimes_spec, partition, self.profile),
+            crime_columns,
+            functools.partial(_index_crimes, cell_size=self.cell_size),
+        )
@@ -0,0 +1,131 @@
+"""HTTP service answering lake queries with JSON.
+
+Started with python lake_service.py --root /data/lake --port 8080, it
+answers e.g. localhost:8080/schools/400010/crimes?radius=300&days=90.
+"""
+
+import argparse
+import json
+import time
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlparse
+
+import pandas as pd
+from ingest_spec import full_profile
+from lake_files import FileCache, lake_files
+from lake_queries import Circle, Lake
+
+default_port = 8080
+default_schools = 5
+default_days = 90
+default_radius = 500
+
+
+def _school_crimes(lake: Lake, school_id: str, query: dict) -> pd.DataFrame:
+    today = pd.Timestamp.now().date()
+    end = pd.Timestamp(query.get('end', today))
+    days = int(query.get('days', default_days))
+    start = end - pd.Timedelta(days=days - 1)
+    first_and_last = (str(start.date()), str(end.date()))
+    return lake.crimes_near_school(
+        int(school_id),
+        float(query.get('radius', default_radius)),
+        first_and_last,
+        query.get('location_description', ''),
+    )
+
+
+def _crimes(lake: Lake, query: dict) -> pd.DataFrame:
+    circle = None
+    lat = query.get('lat')
+    if lat is not None:
+        circle = Circle(
+            float(lat),
+            float(query['lon']),
+            float(query.get('radius', 0)),
+        )
+    first_and_last = (query['start'], query['end'])
+    return lake.crimes(
+        first_and_last,
+        circle,
+        query.get('location_description', ''),
+    )
+
+
+def answer(lake: Lake, path: str) -> dict:
+    """Run query of request path and build JSON answer.
+
+    /schools/nearest?lat=&lon=&k=
+    /schools/<school_id>/crimes?radius=&days=&end=&location_description=
+    /crimes?start=&end=&lat=&lon=&radius=&location_description=
+
+    Raises:
+        LookupError: path is not one of the queries.
+    """
+    parsed = urlparse(path)
+    query = dict(parse_qsl(parsed.query))
+    started = time.perf_counter()
+    match parsed.path.strip('/').split('/'):
+        case ['schools', 'nearest']:
+            found = lake.nearest_schools(
+                float(query['lat']),
+                float(query['lon']),
+                int(query.get('k', default_schools)),
+            )
+        case ['schools', school_id, 'crimes']:
+            found = _school_crimes(lake, school_id, query)
+        case ['crimes']:
+            found = _crimes(lake, query)
+        case _:
+            raise LookupError(parsed.path)
+    return {
+        'rows': json.loads(found.to_json(orient='records', date_format='iso')),
+        'elapsed_ms': (time.perf_counter() - started) * 1000,
+    }
+
+
+class LakeHandler(BaseHTTPRequestHandler):
+    """Answer GET requests with JSON of lake queries."""
+
+    def do_GET(self) -> None:  # noqa: N802
+        """Send answer, bad queries get 400 and unknown ones 404."""
+        try:
+            body = json.dumps(answer(self.server.lake, self.path)).encode()
+        except KeyError as error:
+            message = 'Missing parameter {e}'.format(e=error)
+            self.send_error(HTTPStatus.BAD_REQUEST, message)
+            return
+        except LookupError as error:
+            self.send_error(HTTPStatus.NOT_FOUND, str(error))
+            return
+        except ValueError as error:
+            self.send_error(HTTPStatus.BAD_REQUEST, str(error))
+            return
+        self._send_json(body)
+
+    def _send_json(self, body: bytes) -> None:
+        self.send_response(HTTPStatus.OK)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class LakeServer(ThreadingHTTPServer):
+    """HTTP server answering queries over one lake."""
+
+    def __init__(self, port: int, lake: Lake) -> None:
+        """Listen on port of every interface."""
+        super().__init__(('', port), LakeHandler)
+        self.lake = lake
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Query service over datalake.')
+    parser.add_argument('--root', default='')
+    parser.add_argument('--profile', default=full_profile)
+    parser.add_argument('--port', type=int, default=default_port)
+    args = parser.parse_args()
+    lake = Lake(FileCache(lake_files(args.root)), args.profile)
+    LakeServer(args.port, lake).serve_forever()
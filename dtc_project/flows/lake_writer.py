@@ -0,0 +1,84 @@
+"""Writing parquet files of dataset partitions to the datalake bucket."""
+
+import os
+from typing import Optional
+
+import pandas as pd
+import pyarrow as pa
+from ingest_spec import DatasetSpec, Partition, full_profile
+from prefect_gcp.cloud_storage import GcsBucket
+from pyarrow import parquet as pq
+from spatial_layout import write_spatial_parquet
+
+GCS_BUCKET_BLOCK_NAME = 'GCS_BUCKET_BLOCK_NAME'
+
+
+def gcs_path(spec: DatasetSpec, partition: Partition, profile: str) -> str:
+    """Build path of partition parquet file in GCS bucket.
+
+    Files of not full ingest profiles have other columns, so they are kept
+    in a subfolder named after the profile.
+    """
+    if spec.gcs_path_env in os.environ:
+        to_path_place = os.environ.get(spec.gcs_path_env)
+    else:
+        to_path_place = spec.default_gcs_path
+
+    if profile != full_profile:
+        to_path_place = '{p}{n}/'.format(p=to_path_place, n=profile)
+
+    if spec.gcs_file_env in os.environ:
+        to_path_file = os.environ.get(spec.gcs_file_env)
+    else:
+        to_path_file = spec.default_gcs_file
+
+    return '{p}{f}{s}.parquet'.format(
+        p=to_path_place,
+        f=to_path_file,
+        s=partition.suffix,
+    )
+
+
+def bucket_block() -> str:
+    """Get name of GCS bucket block for datalake."""
+    if GCS_BUCKET_BLOCK_NAME in os.environ:
+        return os.environ.get(GCS_BUCKET_BLOCK_NAME)
+    return 'chicago-gcs-bucket'
+
+
+def datalake_bucket() -> GcsBucket:
+    """Load GCS bucket block of datalake."""
+    return GcsBucket.load(bucket_block())
+
+
+def write_partition_parquet(table: pa.Table, path: str, spec: DatasetSpec) -> None:
+    """Write partition parquet file, spatially ordered when spec asks for it."""
+    if spec.spatial_sort and set(spec.spatial_columns) <= set(table.column_names):
+        write_spatial_parquet(table, path, *spec.spatial_columns)
+    else:
+        pq.write_table(table, path)
+
+
+class ParquetSink(object):
+    """Encode cleaned chunks as row groups of one parquet file."""
+
+    def __init__(self, path: str) -> None:
+        """Remember where to write the file."""
+        self.path = path
+        self.rows = 0
+        self._writer: Optional[pq.ParquetWriter] = None
+
+    def __call__(self, df: pd.DataFrame) -> None:
+        """Append cleaned chunk to the file."""
+        if df.empty:
+            return
+        table = pa.Table.from_pandas(df, preserve_index=True)
+        if self._writer is None:
+            self._writer = pq.ParquetWriter(self.path, table.schema)
+        self._writer.write_table(table.cast(self._writer.schema))
+        self.rows += len(df)
+
+    def close(self) -> None:
+        """Finish the parquet file."""
+        if self._writer is not None:
+            self._writer.close()
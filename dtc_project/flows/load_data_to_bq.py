@@ -2,8 +2,10 @@
 
 import os
 
+from ingest_spec import full_profile
 from prefect import flow, get_run_logger, task
 from prefect_gcp.bigquery import BigQueryWarehouse
+from profiling import profiled, set_mode
 
 GCP_PROJECT_ID = 'GCP_PROJECT'
 
@@ -72,10 +74,15 @@ else:
 
 
 @task(name='create external crimes table')
-def create_ext_crimes_table() -> None:
-    """Create external crimes table from files in datalake."""
+@profiled
+def create_ext_crimes_table(profile: str = full_profile) -> None:
+    """Create external crimes table from files of ingest profile in datalake."""
     logger = get_run_logger()
     logger.info('INFO: Starting load crimes to external table')
+    if profile == full_profile:
+        from_path = from_path_crimes
+    else:
+        from_path = '{p}{n}/'.format(p=from_path_crimes, n=profile)
     with BigQueryWarehouse.load(bq_block_name) as warehouse:
         operation = """
         CREATE OR REPLACE EXTERNAL TABLE `{project}.{dataset}.external_{table}`
@@ -88,7 +95,7 @@ def create_ext_crimes_table() -> None:
             dataset=bq_dataset_name,
             table=bq_crimes_table_name,
             bucket=bucket_name,
-            from_path=from_path_crimes,
+            from_path=from_path,
             file=crimes_file_name,
         )
         warehouse.execute(operation)
@@ -96,6 +103,7 @@ def create_ext_crimes_table() -> None:
 
 
 @task(name='create partitioned and clustered crimes table')
+@profiled
 def create_crimes_table() -> None:
     """Create partitioned and clustered crimes table from external table."""
     logger = get_run_logger()
@@ -117,6 +125,7 @@ def create_crimes_table() -> None:
 
 
 @task(name='create external shools table')
+@profiled
 def create_ext_schools_table() -> None:
     """Create external schools table from files in datalake."""
     logger = get_run_logger()
@@ -141,6 +150,7 @@ def create_ext_schools_table() -> None:
 
 
 @task(name='create shools table')
+@profiled
 def create_schools_table() -> None:
     """Create schools table from external table."""
     logger = get_run_logger()
@@ -159,11 +169,19 @@ def create_schools_table() -> None:
 
 
 @flow(name='Load data to BQ')
-def load_data_to_bq() -> None:
-    """Load crimes and schols data to bq."""
+def load_data_to_bq(
+    crimes_profile: str = full_profile,
+    profiling: str = '',
+) -> None:
+    """Load crimes and schols data to bq.
+
+    crimes_profile selects which crimes ingest profile files are loaded.
+    Profiling 'sampling' or 'deterministic' profiles every task.
+    """
+    set_mode(profiling)
     logger = get_run_logger()
     logger.info('INFO: Starting loadig data to BQ')
-    create_ext_crimes_table()
+    create_ext_crimes_table(crimes_profile)
     create_crimes_table()
     create_ext_schools_table()
     create_schools_table()
@@ -0,0 +1,158 @@
+"""In-process streaming pipeline joined by bounded queues."""
+
+import contextlib
+import multiprocessing
+import queue
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Iterable, Optional
+
+end_of_stream = object()
+put_timeout = 0.1
+# workers are started fresh, forking a process with running threads (flow
+# engine, logging) can copy a held lock into the child and hang it
+worker_start_method = 'spawn'
+
+
+class StageError(Exception):
+    """Raised in the sink thread when an upstream stage has failed."""
+
+
+class _StageThreads(object):
+    """Run stage threads, stop and join them when the block is left."""
+
+    def __init__(
+        self,
+        threads: list[threading.Thread],
+        stop: threading.Event,
+    ) -> None:
+        self._threads = threads
+        self._stop = stop
+
+    def __enter__(self) -> None:
+        for thread in self._threads:
+            thread.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self._stop.set()
+        for thread in self._threads:
+            thread.join()
+
+
+def put_until_stopped(
+    target: queue.Queue,
+    element: Any,
+    stop: threading.Event,
+) -> bool:
+    """Put element to a bounded queue, give up when the pipeline is stopped."""
+    while not stop.is_set():
+        try:
+            target.put(element, timeout=put_timeout)
+        except queue.Full:
+            continue
+        return True
+    return False
+
+
+def _produce(
+    source: Iterable[Any],
+    raw_queue: queue.Queue,
+    stop: threading.Event,
+    errors: list,
+) -> None:
+    """Put every source element to the raw queue, blocking while it is full."""
+    try:
+        for element in source:
+            if not put_until_stopped(raw_queue, element, stop):
+                return
+    except Exception as error:  # noqa: B902
+        errors.append(error)
+    put_until_stopped(raw_queue, end_of_stream, stop)
+
+
+def _transform(
+    raw_queue: queue.Queue,
+    clean_queue: queue.Queue,
+    pool: ProcessPoolExecutor,
+    transform: Callable[[Any], Any],
+    stop: threading.Event,
+) -> None:
+    """Submit raw elements to the pool and pass futures on in source order."""
+    while not stop.is_set():
+        try:
+            element = raw_queue.get(timeout=put_timeout)
+        except queue.Empty:
+            continue
+        if element is end_of_stream:
+            put_until_stopped(clean_queue, end_of_stream, stop)
+            return
+        future = pool.submit(transform, element)
+        if not put_until_stopped(clean_queue, future, stop):
+            return
+
+
+def worker_pool(workers: int = 2) -> ProcessPoolExecutor:
+    """Start pool of transform workers, share it between pipeline runs.
+
+    Spawning a worker imports pandas again and takes seconds, so callers
+    running many pipelines start one pool and pass it to each of them.
+    """
+    return ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context(worker_start_method),
+    )
+
+
+def run_pipeline(
+    source: Iterable[Any],
+    transform: Callable[[Any], Any],
+    sink: Callable[[Any], None],
+    queue_size: int = 2,
+    pool: Optional[ProcessPoolExecutor] = None,
+) -> int:
+    """Run download, transform and sink stages concurrently.
+
+    The source is consumed in a producer thread, every element is
+    transformed in a process pool and the results are passed to the sink
+    in the calling thread in source order. Both queues are bounded by
+    queue_size, so at most about 2 * queue_size + workers elements are held
+    in memory and a slow stage throttles the stages before it.
+
+    transform must be a picklable module level function, workers import
+    its module again. The pool is left running for the next pipeline, a
+    pool of two workers is started and shut down when none is passed.
+    Returns number of elements passed to the sink.
+
+    Raises:
+        StageError: the source failed, its error is the cause.
+    """
+    raw_queue: queue.Queue = queue.Queue(maxsize=queue_size)
+    clean_queue: queue.Queue = queue.Queue(maxsize=queue_size)
+    stop = threading.Event()
+    errors: list = []
+    sunk = 0
+
+    with contextlib.nullcontext(pool) if pool else worker_pool() as workers:
+        stages = [
+            threading.Thread(
+                name='pipeline-source',
+                target=_produce,
+                args=(source, raw_queue, stop, errors),
+                daemon=True,
+            ),
+            threading.Thread(
+                name='pipeline-transform',
+                target=_transform,
+                args=(raw_queue, clean_queue, workers, transform, stop),
+                daemon=True,
+            ),
+        ]
+        with _StageThreads(stages, stop):
+            # transformed elements are passed to the sink in this thread
+            for future in iter(clean_queue.get, end_of_stream):
+                sink(future.result())
+                sunk += 1
+
+    if errors:
+        raise StageError('Source stage failed') from errors[0]
+    return sunk
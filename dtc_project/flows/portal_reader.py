@@ -0,0 +1,85 @@
+"""Reading and cleaning CSV row data of datasets from the data portal."""
+
+import os
+from typing import Iterator
+
+import pandas as pd
+from ingest_spec import DatasetSpec
+from prefect import get_run_logger
+from socrata import count_transferred, open_url
+
+INGEST_CHUNK_SIZE = 'INGEST_CHUNK_SIZE'
+
+if INGEST_CHUNK_SIZE in os.environ:
+    chunk_size = int(os.environ.get(INGEST_CHUNK_SIZE))
+else:
+    chunk_size = 10000
+
+
+def transferred_key(spec: DatasetSpec, profile: str) -> str:
+    """Key of transferred bytes counter for dataset and profile."""
+    return '{n} {p}'.format(n=spec.name, p=profile)
+
+
+def csv_dtypes(spec: DatasetSpec) -> dict:
+    """Read string columns of schema as text.
+
+    Otherwise pandas infers types of every chunk by itself, e.g. ward is
+    read as '12' from a chunk of integers and as '7.0' from a chunk with
+    missing values.
+    """
+    return {
+        column: str
+        for column, dtype in spec.schema.items()
+        if dtype == 'string'
+    }
+
+
+def clean_chunk(df: pd.DataFrame, spec: DatasetSpec) -> pd.DataFrame:
+    """Apply cleaning rules and schema of dataset to present columns.
+
+    Plain function, so it can be run in a process pool.
+    """
+    for required in spec.required_columns:
+        if required in df.columns:
+            df = df[df[required].notnull()]
+    if spec.fill_value is not None:
+        df = df.fillna(spec.fill_value)
+    return df.astype({
+        column: dtype
+        for column, dtype in spec.schema.items()
+        if column in df.columns
+    })
+
+
+def read_url(data_url: str, spec: DatasetSpec, profile: str) -> pd.DataFrame:
+    """Download CSV from data portal and count transferred bytes."""
+    logger = get_run_logger()
+    logger.info('INFO: Download link {l}'.format(l=data_url))
+
+    with open_url(data_url) as stream:
+        df = pd.read_csv(stream, dtype=csv_dtypes(spec))
+        count_transferred(transferred_key(spec, profile), stream.raw.size)
+        logger.info('INFO: Downloaded {b} bytes of {n} with {p} profile'.format(
+            b=stream.raw.size,
+            n=spec.name,
+            p=profile,
+        ))
+    return df
+
+
+def iter_chunks(
+    data_url: str,
+    spec: DatasetSpec,
+    profile: str,
+) -> Iterator[pd.DataFrame]:
+    """Stream row data from URL in chunks.
+
+    Yields:
+        DataFrames of chunk_size rows with the same column types.
+    """
+    with open_url(data_url) as stream:
+        reader = pd.read_csv(stream, chunksize=chunk_size, dtype=csv_dtypes(spec))
+        with reader:
+            yield from reader
+        count_transferred(transferred_key(spec, profile), stream.raw.size)
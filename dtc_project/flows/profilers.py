@@ -0,0 +1,141 @@
+"""Sampling and deterministic profilers saving their results to files.
+
+Both profilers are context managers profiling the code run inside them,
+save() writes profile files next to base path and gives their paths with
+a markdown summary of the hottest frames.
+"""
+
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+from collections import Counter
+
+from flame_graph import flame_graph, folded_stacks, top_frames, top_sampled
+
+PROFILE_SAMPLE_INTERVAL = 'PROFILE_SAMPLE_INTERVAL'
+
+if PROFILE_SAMPLE_INTERVAL in os.environ:
+    sample_interval = float(os.environ.get(PROFILE_SAMPLE_INTERVAL))
+else:
+    sample_interval = 0.005
+
+
+def _frame_name(frame) -> str:
+    """Name frame as function (file:line of definition)."""
+    code = frame.f_code
+    return '{f} ({m}:{l})'.format(
+        f=code.co_name,
+        m=os.path.basename(code.co_filename),
+        l=code.co_firstlineno,
+    )
+
+
+def _save(path: str, text: str) -> str:
+    with open(path, 'w') as profile_file:
+        profile_file.write(text)
+    return path
+
+
+def _stack(frame) -> list[str]:
+    """Frame names from the innermost frame to the outermost one."""
+    stack = []
+    while frame is not None:
+        stack.append(_frame_name(frame))
+        frame = frame.f_back
+    return stack
+
+
+class SamplingProfiler(object):
+    """Sample stacks from a background thread.
+
+    The creating thread and every thread started after the profiler are
+    sampled, e.g. stage threads of a pipeline, stacks start with the name
+    of their thread. Worker processes are not sampled.
+    """
+
+    def __init__(self, interval: float = sample_interval) -> None:
+        """Prepare profiler for the current thread."""
+        self.stacks: Counter = Counter()
+        self._thread_id = threading.get_ident()
+        self._started_before = frozenset(
+            thread.ident
+            for thread in threading.enumerate()
+            if thread.ident != self._thread_id
+        )
+        self._interval = interval
+        self._stop = threading.Event()
+        self._sampler = threading.Thread(target=self._run, daemon=True)
+
+    def __enter__(self) -> 'SamplingProfiler':
+        """Start sampling."""
+        self._sampler.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        """Stop sampling and wait for sampler thread."""
+        self._stop.set()
+        self._sampler.join()
+
+    def save(self, base_path: str) -> tuple[list[str], str]:
+        """Save folded stacks and flame graph SVG."""
+        paths = [
+            _save('{b}.folded'.format(b=base_path), folded_stacks(self.stacks)),
+            _save('{b}.svg'.format(b=base_path), flame_graph(self.stacks)),
+        ]
+        rows = ''.join(
+            '| {n} | {c} |\n'.format(n=name, c=count)
+            for name, count in top_sampled(self.stacks)
+        )
+        return paths, '| Frame | Samples |\n|---|---|\n{r}'.format(r=rows)
+
+    def _sampled_threads(self) -> dict[int, str]:
+        """Names of the creating thread and of threads started after it."""
+        started_before = self._started_before | {self._sampler.ident}
+        return {
+            thread.ident: thread.name
+            for thread in threading.enumerate()
+            if thread.ident not in started_before
+        }
+
+    def _run(self) -> None:
+        while not self._stop.wait(self._interval):
+            threads = self._sampled_threads()
+            frames = sys._current_frames()  # noqa: WPS437
+            for thread_id, thread_name in threads.items():
+                stack = _stack(frames.get(thread_id))
+                if stack:
+                    stack.append(thread_name)
+                    self.stacks[';'.join(reversed(stack))] += 1
+
+
+class DeterministicProfiler(object):
+    """Profile every call with cProfile."""
+
+    def __init__(self) -> None:
+        """Prepare cProfile profiler."""
+        self._profiler = cProfile.Profile()
+
+    def __enter__(self) -> 'DeterministicProfiler':
+        """Start profiling."""
+        self._profiler.enable()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        """Stop profiling."""
+        self._profiler.disable()
+
+    def save(self, base_path: str) -> tuple[list[str], str]:
+        """Save pstats dump and text summary."""
+        summary = io.StringIO()
+        stats = pstats.Stats(self._profiler, stream=summary)
+        stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(top_frames)
+        prof_path = '{b}.prof'.format(b=base_path)
+        self._profiler.dump_stats(prof_path)
+        paths = [
+            prof_path,
+            _save('{b}.txt'.format(b=base_path), summary.getvalue()),
+        ]
+        return paths, '```\n{s}\n```'.format(s=summary.getvalue())
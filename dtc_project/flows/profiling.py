@@ -0,0 +1,152 @@
+"""Opt-in profiling of flow tasks with flame graph artifacts.
+
+Profiling is switched on with PROFILE_TASKS environment variable or with
+profiling parameter of a flow, the modes are:
+
+- sampling: low overhead sampling of the task thread and of threads it
+  starts, folded stacks and flame graph in SVG are saved;
+- deterministic: cProfile of the task thread only, pstats dump and text
+  summary are saved.
+
+PROFILE_TASKS=1 (or true, yes, on) means sampling. Files are saved to
+PROFILE_OUTPUT_DIR and, if PROFILE_BUCKET_PATH is set, uploaded to the GCS
+bucket. A markdown artifact with the hottest frames is created for every
+profiled task run. Failing to save a profile is logged and does not fail
+the task.
+"""
+
+import contextlib
+import datetime
+import functools
+import os
+import tempfile
+import time
+from typing import Any, Callable
+
+from prefect import get_run_logger
+from prefect.artifacts import create_markdown_artifact
+from prefect_gcp.cloud_storage import GcsBucket
+from profilers import DeterministicProfiler, SamplingProfiler
+
+PROFILE_TASKS = 'PROFILE_TASKS'
+PROFILE_OUTPUT_DIR = 'PROFILE_OUTPUT_DIR'
+PROFILE_BUCKET_PATH = 'PROFILE_BUCKET_PATH'
+GCS_BUCKET_BLOCK_NAME = 'GCS_BUCKET_BLOCK_NAME'
+
+if PROFILE_OUTPUT_DIR in os.environ:
+    output_dir = os.environ.get(PROFILE_OUTPUT_DIR)
+else:
+    output_dir = os.path.join(tempfile.gettempdir(), 'profiles')
+
+sampling_mode = 'sampling'
+deterministic_mode = 'deterministic'
+profilers = {
+    sampling_mode: SamplingProfiler,
+    deterministic_mode: DeterministicProfiler,
+}
+switched_on = frozenset(('1', 'true', 'yes', 'on'))
+switched_off = frozenset(('', '0', 'false', 'no', 'off'))
+
+_settings = {'mode': ''}
+
+
+def set_mode(mode: str) -> None:
+    """Set profiling mode for the process, empty mode falls back to env.
+
+    Raises:
+        ValueError: mode is not a profiling mode.
+    """
+    if mode and mode not in profilers:
+        raise ValueError('Unknown profiling mode {m}'.format(m=mode))
+    _settings['mode'] = mode
+
+
+def get_mode() -> str:
+    """Get profiling mode, empty string means profiling is off.
+
+    Raises:
+        ValueError: PROFILE_TASKS is neither a mode nor a switch.
+    """
+    if _settings['mode']:
+        return _settings['mode']
+    mode = os.environ.get(PROFILE_TASKS, '').strip().lower()
+    if mode in profilers:
+        return mode
+    if mode in switched_on:
+        return sampling_mode
+    if mode in switched_off:
+        return ''
+    raise ValueError('Unknown {e} value {m}'.format(e=PROFILE_TASKS, m=mode))
+
+
+def _upload(paths: list[str]) -> None:
+    """Upload profile files to GCS bucket if PROFILE_BUCKET_PATH is set."""
+    if PROFILE_BUCKET_PATH not in os.environ:
+        return
+    if GCS_BUCKET_BLOCK_NAME in os.environ:
+        bucket_block = os.environ.get(GCS_BUCKET_BLOCK_NAME)
+    else:
+        bucket_block = 'chicago-gcs-bucket'
+    gcs_bucket = GcsBucket.load(bucket_block)
+    for path in paths:
+        gcs_bucket.upload_from_path(
+            from_path=path,
+            to_path='{p}{f}'.format(
+                p=os.environ.get(PROFILE_BUCKET_PATH),
+                f=os.path.basename(path),
+            ),
+        )
+
+
+def _save_and_report(name: str, profiler, base_path: str) -> None:
+    """Save profile files, upload them and create artifact for task run."""
+    paths, summary = profiler.save(base_path)
+    _upload(paths)
+    files = ''.join('- {p}\n'.format(p=path) for path in paths)
+    create_markdown_artifact(
+        markdown='## Profile of {n}\n\nFiles:\n{f}\n{s}'.format(
+            n=name,
+            f=files,
+            s=summary,
+        ),
+        description='Profile of {n}'.format(n=name),
+    )
+    get_run_logger().info('INFO: Profile of {n} saved to {p}'.format(
+        n=name,
+        p=', '.join(paths),
+    ))
+
+
+def _report(name: str, profiler, base_path: str) -> None:
+    """Report profile, failures are logged to keep the task result."""
+    try:
+        _save_and_report(name, profiler, base_path)
+    except Exception as error:  # noqa: B902
+        get_run_logger().warning('WARNING: Profile of {n} not saved: {e}'.format(
+            n=name,
+            e=error,
+        ))
+
+
+def profiled(func: Callable) -> Callable:
+    """Profile function when profiling is on, put it under @task or @flow."""
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs) -> Any:  # noqa: WPS430
+        mode = get_mode()
+        if not mode:
+            return func(*args, **kwargs)
+
+        os.makedirs(output_dir, exist_ok=True)
+        base_path = os.path.join(output_dir, '{n}_{t}_{i}'.format(
+            n=func.__name__,
+            t=datetime.datetime.now().strftime('%Y%m%d_%H%M%S'),
+            i=time.monotonic_ns(),
+        ))
+        profiler = profilers[mode]()
+        with contextlib.ExitStack() as stack:
+            stack.callback(_report, func.__name__, profiler, base_path)
+            stack.enter_context(profiler)
+            return func(*args, **kwargs)
+
+    return wrapper
@@ -0,0 +1,280 @@
+"""Adaptive rate-limited scheduler of HTTP requests.
+
+Requests start only when a token bucket allows it and fewer than the
+in-flight limit are open. Both the in-flight limit and the refill rate of
+the bucket are adjusted by AIMD: they grow additively with fast answers,
+the limit by one request per round, and are cut by half on throttling,
+server errors or slow answers. Latency is measured until the headers
+are read, so neither body size nor a slow reader of the body cut the
+limit. Throttled and failed requests, including failed body reads, are
+retried with exponential backoff, a Retry-After answer pauses all requests.
+"""
+
+import dataclasses
+import io
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from http.client import HTTPException
+from typing import Optional
+from urllib.request import urlopen
+
+retry_statuses = frozenset((429, 500, 502, 503, 504))
+throttled_status = 429
+skip_size = 65536
+
+
+def retry_after_seconds(header: Optional[str]) -> float:
+    """Read Retry-After header given as seconds or as HTTP date."""
+    if not header:
+        return 0
+    if header.strip().isdigit():
+        return float(header)
+    try:
+        retry_at = parsedate_to_datetime(header)
+    except (TypeError, ValueError):
+        return 0
+    return max(retry_at.timestamp() - time.time(), 0)
+
+
+@dataclasses.dataclass(frozen=True)
+class SchedulerSettings(object):
+    """Limits of scheduled requests, rates are in requests per second."""
+
+    rate: float
+    burst: int
+    max_in_flight: int
+    target_latency: float
+    retries: int
+    backoff: float
+    timeout: float = 60
+    min_in_flight: int = 1
+    decrease_factor: float = 0.5
+    rate_increase: float = 0.1
+    min_rate: float = 0.1
+
+
+class TokenBucket(object):
+    """Bucket of request tokens refilled at a given rate up to burst."""
+
+    def __init__(self, burst: int, now: float) -> None:
+        """Start with a full bucket."""
+        self.tokens = float(burst)
+        self._burst = burst
+        self._refilled = now
+        self._paused_until = now
+
+    def wait_time(self, rate: float, now: float) -> float:
+        """Refill bucket and give seconds until a token is available."""
+        refill = (now - self._refilled) * rate
+        self.tokens = min(self.tokens + refill, self._burst)
+        self._refilled = now
+        if now < self._paused_until:
+            return self._paused_until - now
+        if self.tokens >= 1:
+            return 0
+        return (1 - self.tokens) / rate
+
+    def take(self) -> None:
+        """Take one token for a request."""
+        self.tokens -= 1
+
+    def pause(self, until: float) -> None:
+        """Give no tokens until the given time."""
+        self._paused_until = max(self._paused_until, until)
+
+
+class Aimd(object):
+    """In-flight limit and request rate adjusted by AIMD."""
+
+    def __init__(self, settings: SchedulerSettings) -> None:
+        """Start with maximal rate and half of maximal limit."""
+        self.limit = float(max(settings.max_in_flight // 2, settings.min_in_flight))
+        self.rate = settings.rate
+        self._settings = settings
+        self._decreased: Optional[float] = None
+
+    def increase(self) -> None:
+        """Grow limit by one request per round and rate by one step."""
+        limit = self.limit + 1 / self.limit
+        self.limit = min(limit, self._settings.max_in_flight)
+        self.rate = min(
+            self.rate + self._settings.rate_increase,
+            self._settings.rate,
+        )
+
+    def decrease(self, now: float) -> None:
+        """Cut limit and rate, at most once per round of requests."""
+        settings = self._settings
+        last = self._decreased
+        if last is not None and now - last <= settings.target_latency:
+            return
+        self.limit = max(
+            self.limit * settings.decrease_factor,
+            settings.min_in_flight,
+        )
+        self.rate = max(self.rate * settings.decrease_factor, settings.min_rate)
+        self._decreased = now
+
+
+class RequestScheduler(object):
+    """Token bucket and AIMD in-flight limit shared by all downloads."""
+
+    def __init__(self, settings: SchedulerSettings) -> None:
+        """Start with a full bucket, maximal rate and half of maximal limit."""
+        self.settings = settings
+        self.aimd = Aimd(settings)
+        self.in_flight = 0
+        self.requests = 0
+        self.retried = 0
+        self.throttled = 0
+        self._bucket = TokenBucket(settings.burst, time.monotonic())
+        self._condition = threading.Condition()
+
+    def acquire(self) -> None:
+        """Wait for a free in-flight slot and a token, then take both."""
+        with self._condition:
+            while True:
+                wait = self._bucket.wait_time(self.aimd.rate, time.monotonic())
+                if self.in_flight >= int(self.aimd.limit):
+                    wait = None
+                elif wait == 0:
+                    self._bucket.take()
+                    self.in_flight += 1
+                    self.requests += 1
+                    return
+                self._condition.wait(wait)
+
+    def release(self) -> None:
+        """Free in-flight slot of a closed response."""
+        with self._condition:
+            self.in_flight -= 1
+            self._condition.notify_all()
+
+    def succeeded(self, latency: float) -> None:
+        """Grow limit after fast answer, cut it after slow one."""
+        if latency > self.settings.target_latency:
+            self.failed()
+            return
+        with self._condition:
+            self.aimd.increase()
+            self._condition.notify_all()
+
+    def failed(self, retry_after: float = 0) -> None:
+        """Cut limit once per round of requests, pause on Retry-After."""
+        with self._condition:
+            now = time.monotonic()
+            self.aimd.decrease(now)
+            self._bucket.pause(now + retry_after)
+
+    def request(self, url: str):
+        """Open link within limits, retry throttled and failed requests.
+
+        The in-flight slot is held until release is called for the
+        returned response.
+
+        Returns:
+            HTTP response with headers read.
+        """
+        attempt = 0
+        while True:
+            self.acquire()
+            started = time.monotonic()
+            try:
+                response = urlopen(  # noqa: S310
+                    url,
+                    timeout=self.settings.timeout,
+                )
+            except OSError as error:
+                self.release()
+                self.retry(error, attempt)
+            else:
+                self.succeeded(time.monotonic() - started)
+                return response
+            attempt += 1
+
+    def retry(self, error: Exception, attempt: int) -> None:
+        """Count failed attempt and wait before the next one.
+
+        Connection errors, timeouts, broken bodies and retry statuses are
+        retried, other HTTP errors are not.
+
+        Raises:
+            error: error is not retried or retries are used up.
+        """
+        status = getattr(error, 'code', None)
+        retried = status is None or status in retry_statuses
+        if not retried or attempt >= self.settings.retries:
+            raise error
+        headers = getattr(error, 'headers', None) or {}
+        self.failed(retry_after_seconds(headers.get('Retry-After')))
+        with self._condition:
+            self.retried += 1
+            self.throttled += int(status == throttled_status)
+        delay = self.settings.backoff * 2 ** (attempt + 1)
+        time.sleep(delay * random.uniform(0.5, 1))  # noqa: S311
+
+
+class ScheduledResponse(io.RawIOBase):
+    """Body of scheduled request, read again from the start when it breaks.
+
+    After a failed read the link is requested again and bytes already read
+    are skipped, so readers see one unbroken body. Links must ask for rows
+    in a fixed order, e.g. by :id, or the skipped bytes can differ. The
+    in-flight slot is held until the body is read or the stream is closed.
+    """
+
+    def __init__(self, scheduler: RequestScheduler, url: str) -> None:
+        """Request link, HTTP errors are raised here."""
+        self._scheduler = scheduler
+        self._url = url
+        self._position = 0
+        self._attempt = 0
+        self._finished = False
+        self._response = scheduler.request(url)
+
+    def readable(self) -> bool:
+        """Stream is readable."""
+        return True
+
+    def readinto(self, buffer) -> int:
+        """Read into buffer, request link again when the body breaks."""
+        while True:
+            try:
+                return self._read_into(buffer)
+            except (OSError, HTTPException) as error:
+                self._release()
+                self._scheduler.retry(error, self._attempt)
+                self._attempt += 1
+
+    def close(self) -> None:
+        """Close response and free its in-flight slot."""
+        self._release()
+        super().close()
+
+    def _read_into(self, buffer) -> int:
+        if self._finished:
+            return 0
+        if self._response is None:
+            self._response = self._scheduler.request(self._url)
+            self._skip(self._position)
+        size = self._response.readinto(buffer)
+        if size == 0 and len(buffer):
+            self._finished = True
+            self._release()
+        self._position += size
+        return size
+
+    def _skip(self, size: int) -> None:
+        while size:
+            chunk = self._response.read(min(size, skip_size))
+            if not chunk:
+                raise HTTPException('Body ended before the part already read')
+            size -= len(chunk)
+
+    def _release(self) -> None:
+        if self._response is not None:
+            self._response.close()
+            self._response = None
+            self._scheduler.release()
@@ -80,15 +80,46 @@ def create_prod_tables() -> None:
     logger.info('INFO: Creating prod tables complete')
 
 
+@task(name='Create dashboard tabels')
+def create_dashboard_tables(full_refresh: bool = False) -> None:
+    """Create pre-aggregated tabels for dashboard.
+
+    Models are incremental, months of the last loaded year are recalculated,
+    as the scheduled load refreshes the current year. Earlier years are
+    rebuilt only with full_refresh=True, e.g. after extracting all crimes.
+    """
+    logger = get_run_logger()
+    logger.info('INFO: Creating dashboard tables, full refresh {f}'.format(
+        f=full_refresh,
+    ))
+    build_command = 'dbt build --select tag:dashboard --project-dir /code/flows'
+    if full_refresh:
+        build_command = '{c} --full-refresh'.format(c=build_command)
+    dbt_init = DbtCoreOperation(
+        overwrite_profiles=False,
+        commands=[
+            'dbt deps --project-dir /code/flows',
+            build_command,
+        ],
+    )
+    dbt_init.run()
+    logger.info('INFO: Creating dashboard tables complete')
+
+
 @flow(name='Transform data with dbt cli')
-def run_dbt() -> None:
-    """Run dbt cloud job."""
+def run_dbt(full_refresh: bool = False) -> None:
+    """Run dbt cloud job.
+
+    Set full_refresh after a backfill of earlier years, so dashboard tables
+    are rebuilt for every month.
+    """
     logger = get_run_logger()
     logger.info('INFO: Starting transform data with dbt cli')
 
     create_dbt_profile()
     create_staging_tables()
     create_prod_tables()
+    create_dashboard_tables(full_refresh)
 
     logger.info('INFO: Transformating data with dbt complete')
 
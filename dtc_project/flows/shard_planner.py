@@ -0,0 +1,100 @@
+"""Planning of fetch shards with roughly equal number of rows.
+
+Row counts per day are asked from the data portal first. Months with more
+rows than the target are split into day ranges, consecutive small months
+are merged, so every shard has about the same amount of work and workers
+stay balanced. Shards always start and end on day boundaries and together
+cover every day of the requested years, so rows added after planning are
+not lost.
+"""
+
+import calendar
+import datetime
+from dataclasses import dataclass
+
+import pandas as pd
+
+months_in_year = 12
+
+
+@dataclass(frozen=True)
+class Shard(object):
+    """Time range fetched by one worker and expected number of its rows."""
+
+    start: str
+    end: str
+    rows: int
+
+
+def read_day_counts(df: pd.DataFrame) -> dict[str, int]:
+    """Read portal answer with day and n columns as counts by ISO day."""
+    return {
+        str(day)[:10]: int(rows)
+        for day, rows in zip(df['day'], df['n'])
+    }
+
+
+def _month_days(year: int, month: int) -> list[str]:
+    return [
+        datetime.date(year, month, day).isoformat()
+        for day in range(1, calendar.monthrange(year, month)[1] + 1)
+    ]
+
+
+def _shard(days: list[str], day_counts: dict[str, int]) -> Shard:
+    return Shard(
+        start='{d}T00:00:00'.format(d=days[0]),
+        end='{d}T23:59:59'.format(d=days[-1]),
+        rows=sum(day_counts.get(day, 0) for day in days),
+    )
+
+
+def _split_month(
+    days: list[str],
+    day_counts: dict[str, int],
+    target_rows: int,
+) -> list[Shard]:
+    """Split month into day ranges of at most target_rows where possible."""
+    shards = []
+    pending: list[str] = []
+    pending_rows = 0
+    for day in days:
+        rows = day_counts.get(day, 0)
+        if pending and pending_rows + rows > target_rows:
+            shards.append(_shard(pending, day_counts))
+            pending, pending_rows = [], 0
+        pending.append(day)
+        pending_rows += rows
+    if pending:
+        shards.append(_shard(pending, day_counts))
+    return shards
+
+
+def plan_shards(
+    day_counts: dict[str, int],
+    years: list[int],
+    target_rows: int,
+) -> list[Shard]:
+    """Plan shards of about target_rows rows for years.
+
+    A single day with more than target_rows rows stays one shard, it is
+    fetched in pages.
+    """
+    shards = []
+    pending: list[str] = []
+    pending_rows = 0
+    for year in sorted(years):
+        for month in range(1, months_in_year + 1):
+            days = _month_days(year, month)
+            month_rows = sum(day_counts.get(day, 0) for day in days)
+            if pending and pending_rows + month_rows > target_rows:
+                shards.append(_shard(pending, day_counts))
+                pending, pending_rows = [], 0
+            if month_rows > target_rows:
+                shards.extend(_split_month(days, day_counts, target_rows))
+            else:
+                pending.extend(days)
+                pending_rows += month_rows
+    if pending:
+        shards.append(_shard(pending, day_counts))
+    return shards
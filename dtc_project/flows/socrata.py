@@ -0,0 +1,138 @@
+"""Building Socrata queries and downloading data from data portal."""
+
+import io
+import os
+import threading
+from collections import defaultdict
+from urllib.parse import quote, urlencode
+
+import request_scheduler
+
+SOCRATA_REQUESTS_PER_SECOND = 'SOCRATA_REQUESTS_PER_SECOND'
+SOCRATA_BURST = 'SOCRATA_BURST'
+SOCRATA_MAX_IN_FLIGHT = 'SOCRATA_MAX_IN_FLIGHT'
+SOCRATA_TARGET_LATENCY = 'SOCRATA_TARGET_LATENCY'
+SOCRATA_RETRIES = 'SOCRATA_RETRIES'
+SOCRATA_BACKOFF = 'SOCRATA_BACKOFF'
+SOCRATA_TIMEOUT = 'SOCRATA_TIMEOUT'
+
+if SOCRATA_REQUESTS_PER_SECOND in os.environ:
+    requests_per_second = float(os.environ.get(SOCRATA_REQUESTS_PER_SECOND))
+else:
+    requests_per_second = 5
+
+if SOCRATA_BURST in os.environ:
+    burst = int(os.environ.get(SOCRATA_BURST))
+else:
+    burst = 10
+
+if SOCRATA_MAX_IN_FLIGHT in os.environ:
+    max_in_flight = int(os.environ.get(SOCRATA_MAX_IN_FLIGHT))
+else:
+    max_in_flight = 8
+
+if SOCRATA_TARGET_LATENCY in os.environ:
+    target_latency = float(os.environ.get(SOCRATA_TARGET_LATENCY))
+else:
+    target_latency = 10
+
+if SOCRATA_RETRIES in os.environ:
+    retries = int(os.environ.get(SOCRATA_RETRIES))
+else:
+    retries = 5
+
+if SOCRATA_BACKOFF in os.environ:
+    backoff = float(os.environ.get(SOCRATA_BACKOFF))
+else:
+    backoff = 1
+
+if SOCRATA_TIMEOUT in os.environ:
+    timeout = float(os.environ.get(SOCRATA_TIMEOUT))
+else:
+    timeout = 60
+
+soql_clauses = ('select', 'where', 'group', 'order', 'limit', 'offset')
+default_limit = 100000
+
+transferred_bytes: defaultdict = defaultdict(int)
+_transferred_lock = threading.Lock()
+
+scheduler = request_scheduler.RequestScheduler(
+    request_scheduler.SchedulerSettings(
+        rate=requests_per_second,
+        burst=burst,
+        max_in_flight=max_in_flight,
+        target_latency=target_latency,
+        retries=retries,
+        backoff=backoff,
+        timeout=timeout,
+    ),
+)
+
+
+def build_url(url: str, **clauses) -> str:
+    """Build resource link with SoQL $select, $where, $group, $order and paging.
+
+    Clauses are given by name without $, select as a list of columns,
+    empty clauses are left out.
+
+    Raises:
+        ValueError: clause is not one of soql_clauses.
+    """
+    unknown = set(clauses) - set(soql_clauses)
+    if unknown:
+        raise ValueError('Unknown SoQL clauses {c}'.format(c=sorted(unknown)))
+    clauses.setdefault('limit', default_limit)
+    if clauses.get('select'):
+        clauses['select'] = ','.join(clauses['select'])
+    query = {
+        '${c}'.format(c=clause): clauses[clause]
+        for clause in soql_clauses
+        if clauses.get(clause)
+    }
+    return '{u}?{q}'.format(
+        u=url,
+        q=urlencode(query, quote_via=quote, safe='$,'),
+    )
+
+
+def count_transferred(profile: str, size: int) -> None:
+    """Add downloaded bytes to total of ingest profile."""
+    with _transferred_lock:
+        transferred_bytes[profile] += size
+
+
+class CountingReader(io.RawIOBase):
+    """Readable stream that counts bytes read from the wrapped response."""
+
+    def __init__(self, response) -> None:
+        """Wrap scheduled response or any binary file object."""
+        self._response = response
+        self.size = 0
+
+    def readable(self) -> bool:
+        """Stream is readable."""
+        return True
+
+    def readinto(self, buffer) -> int:
+        """Read into buffer and count bytes."""
+        size = self._response.readinto(buffer)
+        self.size += size
+        return size
+
+    def close(self) -> None:
+        """Close the wrapped response once."""
+        if not self.closed:
+            self._response.close()
+        super().close()
+
+
+def open_url(url: str) -> io.BufferedReader:
+    """Open link for streaming through the shared request scheduler.
+
+    The raw stream counts transferred bytes, a body that breaks is
+    requested again and continued where it broke. Closing the stream frees
+    the in-flight slot of the request.
+    """
+    response = request_scheduler.ScheduledResponse(scheduler, url)
+    return io.BufferedReader(CountingReader(response))
@@ -0,0 +1,134 @@
+"""Spatial ordering of parquet files by a Hilbert curve.
+
+Rows are sorted by the Hilbert key of their coordinates and written in
+small row groups, so every row group covers a compact area and min/max
+statistics of the coordinate columns let readers skip row groups outside
+a spatial filter. Bounding boxes of the file and of every row group are
+stored in footer metadata in GeoParquet order [xmin, ymin, xmax, ymax].
+"""
+
+import json
+import os
+
+import numpy as np
+import pyarrow as pa
+from pyarrow import compute as pc
+from pyarrow import parquet as pq
+
+SPATIAL_ROW_GROUP_SIZE = 'SPATIAL_ROW_GROUP_SIZE'
+
+if SPATIAL_ROW_GROUP_SIZE in os.environ:
+    spatial_row_group_size = int(os.environ.get(SPATIAL_ROW_GROUP_SIZE))
+else:
+    spatial_row_group_size = 2048
+
+curve_order = 16
+metadata_key = b'spatial_layout'
+
+
+def hilbert_key(
+    x_cells: np.ndarray,
+    y_cells: np.ndarray,
+    order: int = curve_order,
+) -> np.ndarray:
+    """Distance along Hilbert curve of integer cells in [0, 2 ** order)."""
+    x_cells = x_cells.astype(np.int64)
+    y_cells = y_cells.astype(np.int64)
+    key = np.zeros(len(x_cells), dtype=np.int64)
+    side = 1 << order
+    cell = side >> 1
+    while cell > 0:
+        x_upper = (x_cells & cell) > 0
+        y_upper = (y_cells & cell) > 0
+        key += cell * cell * ((3 * x_upper) ^ y_upper)
+        x_cells, y_cells = _rotate(x_cells, y_cells, side - 1, x_upper, y_upper)
+        cell >>= 1
+    return key
+
+
+def _rotate(
+    x_cells: np.ndarray,
+    y_cells: np.ndarray,
+    last_cell: int,
+    x_upper: np.ndarray,
+    y_upper: np.ndarray,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Turn cells of lower quadrants, so the curve continues inside them."""
+    flip = np.logical_and(x_upper, np.logical_not(y_upper))
+    x_cells = np.where(flip, last_cell - x_cells, x_cells)
+    y_cells = np.where(flip, last_cell - y_cells, y_cells)
+    swapped_x = np.where(y_upper, x_cells, y_cells)
+    swapped_y = np.where(y_upper, y_cells, x_cells)
+    return swapped_x, swapped_y
+
+
+def _cells(coordinates: np.ndarray, low: float, high: float) -> np.ndarray:
+    last_cell = (1 << curve_order) - 1
+    scale = last_cell / (high - low) if high > low else 0
+    scaled = (coordinates - low) * scale
+    return np.nan_to_num(scaled).astype(np.int64)
+
+
+def _coordinates(table: pa.Table, column: str) -> np.ndarray:
+    return pc.cast(table[column], pa.float64()).to_numpy()
+
+
+def bbox(table: pa.Table, x_column: str, y_column: str) -> list[float]:
+    """Bounding box of coordinates as [xmin, ymin, xmax, ymax]."""
+    x_range = pc.min_max(table[x_column])
+    y_range = pc.min_max(table[y_column])
+    return [
+        x_range['min'].as_py(),
+        y_range['min'].as_py(),
+        x_range['max'].as_py(),
+        y_range['max'].as_py(),
+    ]
+
+
+def spatial_sort(table: pa.Table, x_column: str, y_column: str) -> pa.Table:
+    """Sort rows by Hilbert key, rows without coordinates go last."""
+    x_coords = _coordinates(table, x_column)
+    y_coords = _coordinates(table, y_column)
+    located = np.isfinite(x_coords) & np.isfinite(y_coords)
+    if not located.any():
+        return table
+    key = hilbert_key(
+        _cells(x_coords, np.nanmin(x_coords), np.nanmax(x_coords)),
+        _cells(y_coords, np.nanmin(y_coords), np.nanmax(y_coords)),
+    )
+    key = np.where(located, key, np.iinfo(np.int64).max)
+    return table.take(pa.array(np.argsort(key, kind='stable')))
+
+
+def write_spatial_parquet(
+    table: pa.Table,
+    path: str,
+    x_column: str,
+    y_column: str,
+    row_group_size: int = spatial_row_group_size,
+) -> None:
+    """Write table sorted along Hilbert curve with bounding box metadata."""
+    table = spatial_sort(table, x_column, y_column)
+    layout = {
+        'curve': 'hilbert',
+        'order': curve_order,
+        'covering': {
+            'xmin': x_column,
+            'ymin': y_column,
+            'xmax': x_column,
+            'ymax': y_column,
+        },
+        'bbox': bbox(table, x_column, y_column),
+        'row_group_size': row_group_size,
+        'row_group_bboxes': [
+            bbox(table.slice(start, row_group_size), x_column, y_column)
+            for start in range(0, table.num_rows, row_group_size)
+        ],
+    }
+    metadata = dict(table.schema.metadata or {})
+    metadata[metadata_key] = json.dumps(layout).encode()
+    pq.write_table(
+        table.replace_schema_metadata(metadata),
+        path,
+        row_group_size=row_group_size,
+    )
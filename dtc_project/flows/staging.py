@@ -0,0 +1,159 @@
+"""Local staging area for hand-off of data between tasks as Arrow IPC files.
+
+A stage writes its result to an uncompressed Arrow IPC (Feather v2) file
+and returns only the file path, the next stage memory-maps the file, so
+data is neither pickled nor copied by the orchestrator. Every flow run
+stages to its own directory, so concurrent runs never share files, and
+retries of a crashed flow run, which keep the run id, resume from the
+last staged result. Staged files are reused while they are younger than
+STAGING_MAX_AGE hours and the file they were made from is unchanged.
+Directories of runs that failed for good are removed once they are older
+than STAGING_MAX_AGE, when the next run starts staging.
+"""
+
+import contextlib
+import os
+import shutil
+import tempfile
+import time
+from typing import Optional
+
+import pandas as pd
+import pyarrow as pa
+from prefect.runtime import flow_run
+from pyarrow import feather
+from pyarrow import parquet as pq
+
+STAGING_DIR = 'STAGING_DIR'
+STAGING_MAX_AGE = 'STAGING_MAX_AGE'
+STAGING_FLOW_RETRIES = 'STAGING_FLOW_RETRIES'
+STAGING_FLOW_RETRY_DELAY = 'STAGING_FLOW_RETRY_DELAY'
+
+if STAGING_DIR in os.environ:
+    staging_dir = os.environ.get(STAGING_DIR)
+else:
+    staging_dir = os.path.join(tempfile.gettempdir(), 'staging')
+
+if STAGING_MAX_AGE in os.environ:
+    staging_max_age = float(os.environ.get(STAGING_MAX_AGE))
+else:
+    staging_max_age = 24
+
+# retries of ingest flows, a retried flow run keeps its id and staged files
+if STAGING_FLOW_RETRIES in os.environ:
+    flow_retries = int(os.environ.get(STAGING_FLOW_RETRIES))
+else:
+    flow_retries = 1
+
+if STAGING_FLOW_RETRY_DELAY in os.environ:
+    flow_retry_delay = int(os.environ.get(STAGING_FLOW_RETRY_DELAY))
+else:
+    flow_retry_delay = 60
+
+seconds_in_hour = 3600
+source_key = b'staged_from'
+
+
+def run_directory() -> str:
+    """Get staging directory of the current flow run."""
+    return os.path.join(staging_dir, flow_run.id or 'no_flow_run')
+
+
+def purge_old_runs() -> list[str]:
+    """Remove run directories not changed for STAGING_MAX_AGE hours.
+
+    Returns paths of removed directories.
+    """
+    if not os.path.isdir(staging_dir):
+        return []
+    oldest = time.time() - staging_max_age * seconds_in_hour
+    old_runs = [
+        entry.path
+        for entry in os.scandir(staging_dir)
+        if entry.is_dir() and entry.stat().st_mtime < oldest
+    ]
+    for old_run in old_runs:
+        shutil.rmtree(old_run, ignore_errors=True)
+    return old_runs
+
+
+class StagedFile(object):
+    """Staged file of the current flow run, optionally made from another.
+
+    Modification time of the source file is kept in the schema metadata,
+    a file made from a source that has been staged again is not reused.
+    """
+
+    def __init__(self, name: str, source: Optional[str] = None) -> None:
+        """Name staged file and the staged file it is made from."""
+        self.path = os.path.join(run_directory(), '{n}.arrow'.format(n=name))
+        self._source = source
+
+    def is_fresh(self) -> bool:
+        """Check that staged file exists and can be reused."""
+        if not os.path.exists(self.path):
+            return False
+        age = time.time() - os.path.getmtime(self.path)
+        if age > staging_max_age * seconds_in_hour:
+            return False
+        metadata = pa.ipc.open_file(pa.memory_map(self.path)).schema.metadata
+        return (metadata or {}).get(source_key) == self._source_stamp()
+
+    def write_table(self, table: pa.Table) -> str:
+        """Write Arrow table to staging area and return its path.
+
+        File is written under temporary name and renamed, so a crash never
+        leaves a partly written staged file.
+        """
+        if not os.path.isdir(run_directory()):
+            purge_old_runs()
+            os.makedirs(run_directory(), exist_ok=True)
+        source_stamp = self._source_stamp()
+        if source_stamp is not None:
+            table = table.replace_schema_metadata({
+                **(table.schema.metadata or {}),
+                source_key: source_stamp,
+            })
+        tmp_path = '{p}.tmp'.format(p=self.path)
+        feather.write_feather(table, tmp_path, compression='uncompressed')
+        os.replace(tmp_path, self.path)
+        return self.path
+
+    def write_dataframe(self, df: pd.DataFrame) -> str:
+        """Write DataFrame to staging area and return its path."""
+        return self.write_table(pa.Table.from_pandas(df))
+
+    def remove(self) -> None:
+        """Remove staged file, and run directory once it is empty."""
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        with contextlib.suppress(OSError):
+            os.rmdir(run_directory())
+
+    def _source_stamp(self) -> Optional[bytes]:
+        if self._source is None:
+            return None
+        return str(os.stat(self._source).st_mtime_ns).encode()
+
+
+def load_staged_table(path: str) -> pa.Table:
+    """Memory-map staged file, buffers of the table are not copied."""
+    return pa.ipc.open_file(pa.memory_map(path)).read_all()
+
+
+def load_staged(path: str) -> pd.DataFrame:
+    """Memory-map staged file as DataFrame.
+
+    Numeric columns without nulls are not copied, they are read-only.
+    """
+    return load_staged_table(path).to_pandas(split_blocks=True)
+
+
+def staged_rows(path: str) -> int:
+    """Get number of rows in staged file."""
+    return load_staged_table(path).num_rows
+
+
+def write_staged_parquet(path: str, parquet_path: str) -> None:
+    """Write staged file as parquet without converting it to DataFrame."""
+    pq.write_table(load_staged_table(path), parquet_path)
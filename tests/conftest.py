@@ -0,0 +1,58 @@
+"""Fixtures of flow tests: local bucket instead of GCS, no flow run context."""
+
+import functools
+import io
+import logging
+import pathlib
+
+import lake_writer
+import pandas as pd
+import portal_reader
+import pytest
+from socrata import CountingReader
+
+from tests.load.fake_socrata import socrata_date_format
+from tests.load.local_stand_ins import LocalBucket
+
+logging_modules = (
+    'portal_reader',
+    'ingest_tasks',
+    'ingest_pipelined',
+    'ingest_staged',
+    'ingest_planned',
+    'ingest_engine',
+)
+
+
+def _open_csv(csv_path: pathlib.Path, data_url: str) -> io.BufferedReader:
+    return io.BufferedReader(CountingReader(csv_path.open('rb')))
+
+
+def serve_csv(df: pd.DataFrame, csv_path: pathlib.Path) -> None:
+    """Save DataFrame as the data portal formats it."""
+    df.to_csv(csv_path, index=False, date_format=socrata_date_format)
+
+
+@pytest.fixture
+def local_bucket(monkeypatch, tmp_path) -> LocalBucket:
+    """Run ingest tasks outside of a flow, writing to a temporary bucket."""
+    monkeypatch.setattr(LocalBucket, 'root', str(tmp_path / 'bucket'))
+    monkeypatch.setattr(lake_writer, 'GcsBucket', LocalBucket)
+    for module_name in logging_modules:
+        monkeypatch.setattr(
+            '{m}.get_run_logger'.format(m=module_name),
+            functools.partial(logging.getLogger, __name__),
+        )
+    return LocalBucket()
+
+
+@pytest.fixture
+def portal_csv(monkeypatch, tmp_path) -> pathlib.Path:
+    """Answer every data portal request with the CSV file."""
+    csv_path = tmp_path / 'portal.csv'
+    monkeypatch.setattr(
+        portal_reader,
+        'open_url',
+        functools.partial(_open_csv, csv_path),
+    )
+    return csv_path
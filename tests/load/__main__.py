@@ -0,0 +1,100 @@
+"""End-to-end load test of extract and load flows on local stand-ins.
+
+Real flows run against a fake Socrata server with synthetic data, a
+filesystem bucket and a DuckDB warehouse. Throughput and latency of every
+stage are reported, with a baseline the run fails when throughput drops
+or latency grows by more than the allowed regression. Run it from the
+repository root with the flows on the path:
+
+    PYTHONPATH=dtc_project/flows python -m tests.load --years 2021 2022 \
+        --baseline load_test_baseline.json --max-regression 0.2
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+from typing import Optional
+
+import ingest_spec
+
+from tests.load.stages import extract, load_and_export
+from tests.load.stats import regressions
+
+default_rows_per_day = 700
+default_schools = 650
+default_max_regression = 0.2
+
+
+def _add_run_options(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument('--years', type=int, nargs='+', default=[2022])
+    parser.add_argument('--rows-per-day', type=int, default=default_rows_per_day)
+    parser.add_argument('--schools', type=int, default=default_schools)
+    parser.add_argument(
+        '--mode',
+        choices=['sequential', 'pipelined', 'staged', 'planned'],
+        default='sequential',
+    )
+    parser.add_argument('--profile', default=ingest_spec.full_profile)
+    parser.add_argument('--portal-rate-limit', type=int, default=0)
+    parser.add_argument('--spatial-sort', action='store_true')
+    parser.add_argument('--workdir', default='')
+
+
+def _add_report_options(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument('--report', default='')
+    parser.add_argument('--baseline', default='')
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument(
+        '--max-regression',
+        type=float,
+        default=default_max_regression,
+    )
+
+
+def parse_args(argv: Optional[list[str]]) -> argparse.Namespace:
+    """Parse command line."""
+    parser = argparse.ArgumentParser(description='Load test of flows.')
+    _add_run_options(parser)
+    _add_report_options(parser)
+    return parser.parse_args(argv)
+
+
+def run_load_test(args: argparse.Namespace, root: str) -> dict:
+    """Run flows on stand-ins and collect stage statistics."""
+    report = extract(args, root)
+    report.update(load_and_export(args, root))
+    return report
+
+
+def write_json(path: str, report: dict) -> None:
+    """Save report as JSON file."""
+    with open(path, 'w') as json_file:
+        json.dump(report, json_file, indent=2)
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    """Run load test, return non-zero exit code on regression."""
+    args = parse_args(argv)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        report = run_load_test(args, args.workdir or tmp_dir)
+    print(json.dumps(report, indent=2))  # noqa: WPS421
+
+    if args.report:
+        write_json(args.report, report)
+    if not args.baseline:
+        return 0
+    if args.save_baseline or not os.path.exists(args.baseline):
+        write_json(args.baseline, report)
+        return 0
+
+    with open(args.baseline) as baseline_file:
+        found = regressions(report, json.load(baseline_file), args.max_regression)
+    for regression in found:
+        print('REGRESSION {r}'.format(r=regression))  # noqa: WPS421
+    return 1 if found else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
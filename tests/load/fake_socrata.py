@@ -0,0 +1,219 @@
+"""Local Socrata stand-in serving synthetic crimes and schools data.
+
+Queries are answered with the SoQL subset of the soql module. With a rate
+limit requests over it are answered with 429 and Retry-After like the
+portal throttles clients.
+"""
+
+import threading
+import time
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+from urllib.parse import parse_qsl, urlparse
+
+import numpy as np
+import pandas as pd
+
+from tests.load.soql import run_query
+
+crimes_resource = 'ijzp-q8t2'
+schools_resource = 'gqgn-ekwj'
+socrata_date_format = '%Y-%m-%dT%H:%M:%S.000'  # noqa: WPS323
+seconds_in_day = 86400
+
+primary_types = ('THEFT', 'BATTERY', 'CRIMINAL DAMAGE', 'ASSAULT', 'ROBBERY')
+location_descriptions = ('STREET', 'RESIDENCE', 'APARTMENT', 'SIDEWALK')
+grade_cats = ('ES', 'MS', 'HS')
+missing_location_share = 0.01
+arrest_share = 0.1
+domestic_share = 0.2
+first_school_id = 400000
+latitude_range = (41.65, 42.02)
+longitude_range = (-87.93, -87.53)
+x_coordinate_range = (1100000, 1200000)
+y_coordinate_range = (1800000, 1950000)
+
+
+def synthetic_crimes(
+    years: list[int],
+    rows_per_day: int,
+    seed: int = 0,
+) -> pd.DataFrame:
+    """Generate crimes with the real column set, sorted by date."""
+    rng = np.random.default_rng(seed)
+    days = pd.date_range(
+        '{y}-01-01'.format(y=min(years)),
+        '{y}-12-31'.format(y=max(years)),
+        freq='D',
+    )
+    days = days[days.year.isin(years)]
+    rows = len(days) * rows_per_day
+    dates = np.repeat(days.values, rows_per_day) + pd.to_timedelta(
+        rng.integers(0, seconds_in_day, rows),
+        unit='s',
+    ).values
+    dates.sort()
+    latitude = rng.uniform(*latitude_range, rows)
+    longitude = rng.uniform(*longitude_range, rows)
+    latitude[rng.random(rows) < missing_location_share] = np.nan
+    ids = np.arange(1, rows + 1)
+    return pd.DataFrame({
+        'id': ids,
+        'case_number': pd.Series(ids).map('JA{0:06d}'.format),
+        'date': dates,
+        'block': '001XX N STATE ST',
+        'iucr': '0820',
+        'primary_type': rng.choice(primary_types, rows),
+        'description': '$500 AND UNDER',
+        'location_description': rng.choice(location_descriptions, rows),
+        'arrest': rng.random(rows) < arrest_share,
+        'domestic': rng.random(rows) < domestic_share,
+        'beat': '0111',
+        'district': '001',
+        'ward': '42',
+        'community_area': '32',
+        'fbi_code': '06',
+        'x_coordinate': rng.uniform(*x_coordinate_range, rows),
+        'y_coordinate': rng.uniform(*y_coordinate_range, rows),
+        'year': pd.DatetimeIndex(dates).year,
+        'updated_on': dates,
+        'latitude': latitude,
+        'longitude': longitude,
+        'location': '(41.8, -87.6)',
+    })
+
+
+def synthetic_schools(schools: int, seed: int = 0) -> pd.DataFrame:
+    """Generate schools with the real column set."""
+    rng = np.random.default_rng(seed)
+    lat = rng.uniform(*latitude_range, schools)
+    long = rng.uniform(*longitude_range, schools)
+    return pd.DataFrame({
+        'the_geom': [
+            'POINT ({x} {y})'.format(x=lon, y=la)
+            for lon, la in zip(long, lat)
+        ],
+        'school_id': np.arange(first_school_id, first_school_id + schools),
+        'short_name': [
+            'SCHOOL {n}'.format(n=number) for number in range(schools)
+        ],
+        'address': '1 MAIN ST',
+        'grade_cat': rng.choice(grade_cats, schools),
+        'lat': lat,
+        'long': long,
+    })
+
+
+class FakeSocrata(object):
+    """Threaded HTTP server with Socrata resources and request statistics."""
+
+    def __init__(
+        self,
+        resources: dict[str, pd.DataFrame],
+        rate_limit: int = 0,
+    ) -> None:
+        """Serve every DataFrame as /resource/<name>.csv.
+
+        rate_limit is the number of requests answered in a second, zero
+        for no limit.
+        """
+        self.resources = resources
+        self.rate_limit = rate_limit
+        self.latencies: list[float] = []
+        self.bytes_sent = 0
+        self.rows_sent = 0
+        self.throttled = 0
+        self._window = 0
+        self._window_requests = 0
+        self._lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    def url(self, resource: str) -> str:
+        """Get link of resource."""
+        return 'http://127.0.0.1:{p}/resource/{r}.csv'.format(
+            p=self._server.server_address[1],
+            r=resource,
+        )
+
+    def __enter__(self) -> 'FakeSocrata':
+        """Serve on a free port in a background thread in the with block."""
+        bases = (SocrataRequestHandler,)
+        request_handler = type('PortalRequestHandler', bases, {'portal': self})
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), request_handler)
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        """Stop server when the with block ends."""
+        self._server.shutdown()
+        self._server.server_close()
+
+    def admit(self) -> bool:
+        """Count request in its second, False when over rate limit."""
+        if not self.rate_limit:
+            return True
+        with self._lock:
+            window = int(time.monotonic())
+            if window != self._window:
+                self._window = window
+                self._window_requests = 0
+            self._window_requests += 1
+            if self._window_requests <= self.rate_limit:
+                return True
+            self.throttled += 1
+            return False
+
+    def answer(self, path: str) -> Optional[bytes]:
+        """Build CSV answer for request path, None for unknown resource."""
+        parsed = urlparse(path)
+        resource = parsed.path.rsplit('/', 1)[-1].removesuffix('.csv')
+        if resource not in self.resources:
+            return None
+        query = dict(parse_qsl(parsed.query))
+        df = run_query(self.resources[resource], query)
+        body = df.to_csv(index=False, date_format=socrata_date_format).encode()
+        if '$group' not in query:
+            with self._lock:
+                self.rows_sent += len(df)
+        return body
+
+    def record(self, latency: float, size: int) -> None:
+        """Remember latency and size of answered request."""
+        with self._lock:
+            self.latencies.append(latency)
+            self.bytes_sent += size
+
+
+class SocrataRequestHandler(BaseHTTPRequestHandler):
+    """Answer GET requests with resources of the portal."""
+
+    portal: FakeSocrata
+
+    def do_GET(self) -> None:  # noqa: N802
+        """Answer query, throttle requests over the rate limit."""
+        started = time.perf_counter()
+        if not self.portal.admit():
+            self._send(HTTPStatus.TOO_MANY_REQUESTS, b'', {'Retry-After': '1'})
+            return
+        try:
+            body = self.portal.answer(self.path)
+        except (ValueError, KeyError) as error:
+            self.send_error(HTTPStatus.BAD_REQUEST, str(error))
+            return
+        if body is None:
+            self.send_error(HTTPStatus.NOT_FOUND)
+            return
+        self._send(HTTPStatus.OK, body, {'Content-Type': 'text/csv'})
+        self.portal.record(time.perf_counter() - started, len(body))
+
+    def log_message(self, *args) -> None:
+        """Do not log every request."""
+
+    def _send(self, status: HTTPStatus, body: bytes, headers: dict) -> None:
+        self.send_response(status)
+        for name, header in headers.items():
+            self.send_header(name, header)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
@@ -0,0 +1,175 @@
+"""Filesystem bucket and DuckDB warehouse stand-ins for GCP blocks.
+
+LocalBucket replaces GcsBucket and DuckDBWarehouse replaces
+BigQueryWarehouse in the load test. Both keep latency statistics of
+every operation.
+"""
+
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+from types import SimpleNamespace
+from typing import Optional
+
+import duckdb
+import pandas as pd
+
+external_table_pattern = re.compile(
+    r'CREATE OR REPLACE EXTERNAL TABLE\s+(\w+)\s+OPTIONS\s*\((.*?)\)\s*;',
+    re.DOTALL | re.IGNORECASE,
+)
+uri_pattern = re.compile("'gs://[^/]+/([^']+)'")
+partition_pattern = re.compile(
+    r'PARTITION BY\s+.*?(?=CLUSTER BY|\bAS\b)',
+    re.DOTALL | re.IGNORECASE,
+)
+cluster_pattern = re.compile(r'CLUSTER BY\s+[\w, ]+?(?=\s+AS\b)', re.IGNORECASE)
+quoted_name_pattern = re.compile('`([^`]*)`')
+
+
+class OperationStats(object):
+    """Latencies and sizes of operations of a stand-in."""
+
+    def __init__(self) -> None:
+        """Start with no operations."""
+        self.latencies: list[float] = []
+        self.bytes = 0
+        self._lock = threading.Lock()
+
+    def record(self, started: float, size: int = 0) -> None:
+        """Remember operation started at perf_counter value."""
+        with self._lock:
+            self.latencies.append(time.perf_counter() - started)
+            self.bytes += size
+
+
+class LocalBucket(object):
+    """GcsBucket stand-in keeping objects in a local directory."""
+
+    root = os.path.join(tempfile.gettempdir(), 'local_bucket')
+    stats = OperationStats()
+
+    @classmethod
+    def load(cls, name: str) -> 'LocalBucket':
+        """Any block name gives the same local bucket."""
+        return cls()
+
+    def local_path(self, to_path: str) -> str:
+        """Get local path of object, create its folder."""
+        path = os.path.join(self.root, to_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        return path
+
+    def upload_from_dataframe(
+        self,
+        df: pd.DataFrame,
+        to_path: str,
+        serialization_format=None,
+    ) -> str:
+        """Write DataFrame as parquet object."""
+        started = time.perf_counter()
+        path = self.local_path(to_path)
+        df.to_parquet(path)
+        self.stats.record(started, os.path.getsize(path))
+        return to_path
+
+    def upload_from_path(self, from_path: str, to_path: str) -> str:
+        """Copy local file to object."""
+        started = time.perf_counter()
+        path = self.local_path(to_path)
+        shutil.copyfile(from_path, path)
+        self.stats.record(started, os.path.getsize(path))
+        return to_path
+
+    def download_object_to_path(self, from_path: str, to_path: str) -> str:
+        """Copy object to local file."""
+        shutil.copyfile(os.path.join(self.root, from_path), to_path)
+        return to_path
+
+    def list_blobs(self, folder: str = '') -> list[SimpleNamespace]:
+        """List objects in folder and its subfolders, blobs have a name."""
+        blobs = []
+        top = os.path.join(self.root, folder)
+        for dir_path, _, file_names in os.walk(top):
+            blobs.extend(
+                SimpleNamespace(name=self._object_name(dir_path, file_name))
+                for file_name in file_names
+            )
+        return blobs
+
+    def _object_name(self, dir_path: str, file_name: str) -> str:
+        return os.path.relpath(os.path.join(dir_path, file_name), self.root)
+
+
+def translate_sql(operation: str, bucket_root: str) -> str:
+    """Translate BigQuery DDL of load flow to DuckDB SQL.
+
+    External tables become views over parquet files in the local bucket,
+    partitioning and clustering are dropped, project and dataset are
+    dropped from table names.
+    """
+    operation = quoted_name_pattern.sub(
+        lambda match: match.group(1).rsplit('.', 1)[-1],
+        operation,
+    )
+    external = external_table_pattern.search(operation)
+    if external:
+        uris = ', '.join(
+            "'{r}/{p}'".format(r=bucket_root, p=path)
+            for path in uri_pattern.findall(external.group(2))
+        )
+        view = 'CREATE OR REPLACE VIEW {t} AS SELECT * FROM {s};'
+        return view.format(
+            t=external.group(1),
+            s='read_parquet([{u}], union_by_name=true)'.format(u=uris),
+        )
+    operation = partition_pattern.sub('', operation)
+    return cluster_pattern.sub('', operation)
+
+
+class DuckDBWarehouse(object):
+    """BigQueryWarehouse stand-in executing generated SQL on DuckDB."""
+
+    database = ':memory:'
+    bucket_root = LocalBucket.root
+    stats = OperationStats()
+    _connection: Optional[duckdb.DuckDBPyConnection] = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def load(cls, name: str) -> 'DuckDBWarehouse':
+        """Any block name gives the same warehouse."""
+        return cls()
+
+    @classmethod
+    def connection(cls) -> duckdb.DuckDBPyConnection:
+        """Get shared connection, in-memory database lives with it."""
+        with cls._lock:
+            if cls._connection is None:
+                cls._connection = duckdb.connect(cls.database)
+        return cls._connection
+
+    def __enter__(self) -> 'DuckDBWarehouse':
+        """Warehouse is used as context manager like the block."""
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        """Shared connection stays open."""
+
+    def execute(self, operation: str, *args) -> None:
+        """Translate and execute operation."""
+        started = time.perf_counter()
+        cursor = self.connection().cursor()
+        cursor.execute(translate_sql(operation, self.bucket_root))
+        cursor.close()
+        self.stats.record(started)
+
+    def fetch_all(self, operation: str, *args) -> list:
+        """Translate operation and fetch all rows."""
+        cursor = self.connection().cursor()
+        rows = cursor.execute(translate_sql(operation, self.bucket_root)).fetchall()
+        cursor.close()
+        return rows
@@ -0,0 +1,96 @@
+"""The part of SoQL used by the flows, run over DataFrames.
+
+Supports $select of columns, date_trunc_ymd and count(*) with $group,
+$where with between, =, !=, is not null joined by and, $order, $limit and
+$offset.
+"""
+
+import re
+
+import pandas as pd
+
+where_patterns = (
+    re.compile(r"(\w+) between '([^']*)' and '([^']*)'"),
+    re.compile(r"(\w+) (=|!=) '([^']*)'"),
+    re.compile(r'(\w+) (=|!=) (-?[\d.]+)'),
+    re.compile(r'(\w+) is not null'),
+)
+where_separator = ' and '
+trunc_pattern = re.compile(r'date_trunc_ymd\((\w+)\) as (\w+)')
+count_pattern = re.compile(r'count\(\*\) as (\w+)')
+default_limit = 1000
+
+
+def _literal(df: pd.DataFrame, column: str, literal: str):
+    """Convert SoQL literal to the type of column."""
+    if pd.api.types.is_datetime64_any_dtype(df[column]):
+        return pd.Timestamp(literal)
+    if pd.api.types.is_numeric_dtype(df[column]):
+        return float(literal)
+    return literal
+
+
+def _match(where: str, position: int) -> re.Match:
+    for pattern in where_patterns:
+        match = pattern.match(where, position)
+        if match:
+            return match
+    raise ValueError('Unsupported $where: {w}'.format(w=where[position:]))
+
+
+def _predicate(df: pd.DataFrame, match: re.Match) -> pd.Series:
+    groups = match.groups()
+    column = groups[0]
+    if len(groups) == 1:
+        return df[column].notnull()
+    if match.re is where_patterns[0]:
+        return df[column].between(
+            _literal(df, column, groups[1]),
+            _literal(df, column, groups[2]),
+        )
+    literal = _literal(df, column, groups[2])
+    if groups[1] == '=':
+        return df[column] == literal
+    return df[column] != literal
+
+
+def apply_where(df: pd.DataFrame, where: str) -> pd.DataFrame:
+    """Filter rows with SoQL $where of predicates joined by and."""
+    mask = pd.Series(data=True, index=df.index)
+    position = 0
+    while position < len(where):
+        match = _match(where, position)
+        mask &= _predicate(df, match)
+        position = match.end()
+        if where.startswith(where_separator, position):
+            position += len(where_separator)
+    return df[mask]
+
+
+def apply_select(df: pd.DataFrame, select: str, group: str) -> pd.DataFrame:
+    """Project columns or count rows grouped by day."""
+    if not select:
+        return df
+    if group:
+        trunc = trunc_pattern.search(select)
+        count = count_pattern.search(select)
+        days = df[trunc.group(1)].dt.floor('D')
+        counts = days.value_counts().sort_index()
+        return pd.DataFrame({
+            trunc.group(2): counts.index,
+            count.group(1): counts.values,
+        })
+    return df[select.split(',')]
+
+
+def run_query(df: pd.DataFrame, query: dict) -> pd.DataFrame:
+    """Run SoQL query parameters over data."""
+    df = apply_where(df, query.get('$where', ''))
+    order = query.get('$order', '')
+    if order and order != ':id':
+        df = df.sort_values(order)
+    select = query.get('$select', '')
+    df = apply_select(df, select, query.get('$group', ''))
+    offset = int(query.get('$offset', 0))
+    end = offset + int(query.get('$limit', default_limit))
+    return df.iloc[offset:end]
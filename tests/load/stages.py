@@ -0,0 +1,101 @@
+"""Stages of the load test: flows run on local stand-ins."""
+
+import argparse
+import os
+
+import lake_writer
+import load_data_to_bq
+import profiling
+import socrata
+from arrow_readers import DbApiArrowReader
+from export_from_bq import export_to_parquet
+from extract_crimes_data import extract_crimes
+from extract_schools_data import extract_schools
+
+from tests.load import fake_socrata, stats
+from tests.load.local_stand_ins import DuckDBWarehouse, LocalBucket
+
+
+def use_stand_ins(root: str, portal: fake_socrata.FakeSocrata) -> None:
+    """Point flows to fake Socrata, local bucket and DuckDB warehouse."""
+    os.environ['RAW_DATA_CRIMES_URL'] = portal.url(fake_socrata.crimes_resource)
+    os.environ['RAW_DATA_SCHOOLS_URL'] = portal.url(fake_socrata.schools_resource)
+    os.environ['STAGING_DIR'] = os.path.join(root, 'staging')
+    # extract writes files where load flow reads them, as in the Dockerfile
+    os.environ['GCS_BUCKET_CRIMES_PATH'] = load_data_to_bq.from_path_crimes
+    os.environ['GCS_BUCKET_CRIMES_FILE_NAME'] = load_data_to_bq.crimes_file_name
+    os.environ['GCS_BUCKET_SCHOOLS_PATH'] = load_data_to_bq.from_path_schools
+    os.environ['GCS_BUCKET_SCHOOLS_FILE_NAME'] = load_data_to_bq.schools_file_name
+    LocalBucket.root = os.path.join(root, 'bucket')
+    DuckDBWarehouse.bucket_root = LocalBucket.root
+    lake_writer.GcsBucket = LocalBucket
+    profiling.GcsBucket = LocalBucket
+    load_data_to_bq.BigQueryWarehouse = DuckDBWarehouse
+
+
+def extract(args: argparse.Namespace, root: str) -> dict:
+    """Run extract flows against the fake portal."""
+    crimes = fake_socrata.synthetic_crimes(args.years, args.rows_per_day)
+    portal = fake_socrata.FakeSocrata(
+        {
+            fake_socrata.crimes_resource: crimes,
+            fake_socrata.schools_resource: fake_socrata.synthetic_schools(
+                args.schools,
+            ),
+        },
+        rate_limit=args.portal_rate_limit,
+    )
+    report = {}
+    with portal:
+        use_stand_ins(root, portal)
+        crimes_seconds, _ = stats.timed(lambda: extract_crimes(
+            years=args.years,
+            pipelined=args.mode == 'pipelined',
+            profile=args.profile,
+            staged=args.mode == 'staged',
+            planned=args.mode == 'planned',
+            spatial_sort=args.spatial_sort,
+        ))
+        crimes_rows = portal.rows_sent
+        schools_seconds, _ = stats.timed(extract_schools)
+    report['extract_crimes'] = stats.stage_stats(crimes_seconds, crimes_rows)
+    report['extract_schools'] = stats.stage_stats(schools_seconds, args.schools)
+    # downloads overlap cleaning and writing, so only request latencies
+    # are reported, throughput of the whole extract is in the stages above
+    report['download'] = {
+        'rows': portal.rows_sent,
+        'mb': portal.bytes_sent / stats.bytes_in_mb,
+        **stats.latency_stats(portal.latencies),
+        'throttled': portal.throttled,
+        'retried': socrata.scheduler.retried,
+        'in_flight_limit': socrata.scheduler.aimd.limit,
+        'requests_per_second': socrata.scheduler.aimd.rate,
+    }
+    report['write'] = {
+        'mb': LocalBucket.stats.bytes / stats.bytes_in_mb,
+        **stats.latency_stats(LocalBucket.stats.latencies),
+    }
+    return report
+
+
+def load_and_export(args: argparse.Namespace, root: str) -> dict:
+    """Run load flow on DuckDB and export the crimes table."""
+    seconds, _ = stats.timed(lambda: load_data_to_bq.load_data_to_bq(
+        crimes_profile=args.profile,
+    ))
+    loaded = DuckDBWarehouse().fetch_all(
+        'SELECT count(*) FROM {t}'.format(t=load_data_to_bq.bq_crimes_table_name),
+    )[0][0]
+    report = {
+        'load': {
+            **stats.stage_stats(seconds, loaded),
+            **stats.latency_stats(DuckDBWarehouse.stats.latencies),
+        },
+    }
+    reader = DbApiArrowReader(DuckDBWarehouse.connection())
+    seconds, exported = stats.timed(lambda: export_to_parquet(
+        reader.read_batches(table=load_data_to_bq.bq_crimes_table_name),
+        to_path=os.path.join(root, 'export.parquet'),
+    ))
+    report['export'] = stats.stage_stats(seconds, exported)
+    return report
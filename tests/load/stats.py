@@ -0,0 +1,66 @@
+"""Throughput and latency statistics of load test stages."""
+
+import time
+from typing import Callable
+
+import numpy as np
+
+percentile_median = 50
+percentile_tail = 95
+ms_in_second = 1000
+bytes_in_mb = 1024 * 1024
+
+# metric, sign of a worse value, message of regression
+regression_checks = (
+    ('rows_per_s', -1, '{s}: {c:.0f} rows/s, baseline {b:.0f} rows/s'),
+    ('p95_ms', 1, '{s}: p95 {c:.1f} ms, baseline {b:.1f} ms'),
+)
+
+
+def latency_stats(latencies: list[float]) -> dict:
+    """Median and tail latency in milliseconds."""
+    if not latencies:
+        return {}
+    return {
+        'operations': len(latencies),
+        'p50_ms': float(np.percentile(latencies, percentile_median)) * ms_in_second,
+        'p95_ms': float(np.percentile(latencies, percentile_tail)) * ms_in_second,
+    }
+
+
+def stage_stats(seconds: float, rows: int, size: int = 0) -> dict:
+    """Duration and throughput of a stage."""
+    stats = {
+        'seconds': seconds,
+        'rows': rows,
+        'rows_per_s': rows / seconds if seconds else 0,
+    }
+    if size:
+        stats['mb_per_s'] = size / bytes_in_mb / seconds if seconds else 0
+    return stats
+
+
+def timed(run: Callable) -> tuple:
+    """Run stage, give its wall time and return value."""
+    started = time.perf_counter()
+    returned = run()
+    return time.perf_counter() - started, returned
+
+
+def _stage_regressions(stage: str, current: dict, stats: dict, allowance: float):
+    for metric, direction, message in regression_checks:
+        if metric not in stats:
+            continue
+        allowed = stats[metric] * (1 + direction * allowance)
+        measured = current.get(metric, 0)
+        if (measured - allowed) * direction > 0:
+            yield message.format(s=stage, c=measured, b=stats[metric])
+
+
+def regressions(report: dict, baseline: dict, max_regression: float) -> list[str]:
+    """List stages with throughput or latency worse than baseline allows."""
+    found = []
+    for stage, stats in baseline.items():
+        current = report.get(stage, {})
+        found.extend(_stage_regressions(stage, current, stats, max_regression))
+    return found
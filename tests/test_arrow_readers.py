@@ -0,0 +1,117 @@
+"""Tests of reading tables and query results as Arrow record batches."""
+
+import sqlite3
+
+import duckdb
+import pyarrow as pa
+import pytest
+from arrow_readers import DbApiArrowReader, rebatch
+from export_from_bq import export_to_parquet
+from pyarrow import parquet as pq
+
+rows = 7
+batch_size = 2
+
+
+def batches_of(*sizes: int) -> list[pa.RecordBatch]:
+    """Record batches of consecutive numbers with the given row counts."""
+    batches = []
+    start = 0
+    for size in sizes:
+        end = start + size
+        numbers = pa.array(range(start, end), type=pa.int64())
+        batch = pa.RecordBatch.from_arrays([numbers], names=['n'])
+        batches.append(batch)
+        start = end
+    return batches
+
+
+def fill_table(connection) -> None:
+    """Create table where the first rows have no values."""
+    connection.execute('CREATE TABLE crimes (id BIGINT, ward VARCHAR)')
+    connection.executemany(
+        'INSERT INTO crimes VALUES (?, ?)',
+        [
+            (None if row < 3 else row, None if row < 5 else str(row))
+            for row in range(rows)
+        ],
+    )
+
+
+@pytest.fixture(params=['sqlite', 'duckdb'])
+def connection(request):
+    """Connect to a database with the crimes table.
+
+    Yields:
+        sqlite3 or duckdb connection.
+    """
+    if request.param == 'sqlite':
+        db = sqlite3.connect(':memory:')
+    else:
+        db = duckdb.connect(':memory:')
+    fill_table(db)
+    yield db
+    db.close()
+
+
+@pytest.mark.parametrize(('sizes', 'expected'), [
+    ((3, 4, 5, 1), [5, 5, 3]),
+    ((5, 5), [5, 5]),
+    ((1, 1), [2]),
+    ((), []),
+])
+def test_rebatch_sizes(sizes, expected):
+    """Batches are merged and split into batch_size rows, order is kept."""
+    batches = list(rebatch(iter(batches_of(*sizes)), 5))
+
+    batch_rows = [batch.num_rows for batch in batches]
+    assert batch_rows == expected
+    numbers = pa.Table.from_batches(batches, schema=batches_of(1)[0].schema)
+    assert numbers['n'].to_pylist() == list(range(sum(sizes)))
+
+
+def test_reader_batches_have_one_schema(connection):
+    """Columns empty in the first batch get the type of later values."""
+    reader = DbApiArrowReader(connection)
+
+    batches = list(reader.read_batches(table='crimes', batch_size=batch_size))
+
+    assert [batch.num_rows for batch in batches] == [2, 2, 2, 1]
+    schemas = {batch.schema for batch in batches}
+    assert schemas == {batches[0].schema}
+    table = pa.Table.from_batches(batches)
+    assert table['id'].type == pa.int64()
+    assert table['ward'].type == pa.string()
+    last_ward = table['ward'].to_pylist()[-1]
+    assert last_ward == str(rows - 1)
+
+
+def test_reader_exports_to_parquet(connection, tmp_path):
+    """Batches of every type mix are written to one parquet file."""
+    reader = DbApiArrowReader(connection)
+    path = str(tmp_path / 'export.parquet')
+
+    exported = export_to_parquet(
+        reader.read_batches(query='SELECT * FROM crimes', batch_size=1),
+        path,
+    )
+
+    assert exported == rows
+    assert pq.read_table(path).num_rows == rows
+
+
+def test_reader_column_without_values():
+    """Column without any value is read with null type in every batch."""
+    db = sqlite3.connect(':memory:')
+    db.execute('CREATE TABLE empty_ward (id INTEGER, ward TEXT)')
+    db.executemany('INSERT INTO empty_ward VALUES (?, NULL)', [(1,), (2,), (3,)])
+
+    batches = list(DbApiArrowReader(db).read_batches(
+        table='empty_ward',
+        batch_size=batch_size,
+    ))
+
+    assert [batch.schema.field('ward').type for batch in batches] == [
+        pa.null(),
+        pa.null(),
+    ]
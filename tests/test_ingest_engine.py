@@ -0,0 +1,63 @@
+"""Tests of ingest modes of the dataset ingest engine."""
+
+import os
+
+import ingest_pipelined
+import ingest_tasks
+import lake_writer
+import numpy as np
+import pandas as pd
+import portal_reader
+import pytest
+from dataset_specs import crimes_spec
+from ingest_spec import Partition
+
+from tests.conftest import serve_csv
+from tests.load.fake_socrata import synthetic_crimes
+
+january = Partition(
+    start='2022-01-01T00:00:00',
+    end='2022-01-31T23:59:59',
+    suffix='_2022_01',
+)
+chunk_rows = 50
+wards = 50
+
+
+@pytest.fixture
+def crimes() -> pd.DataFrame:
+    """January crimes, ward is missing only in the rows of later chunks."""
+    df = synthetic_crimes([2022], rows_per_day=5)
+    df = df[df['date'] < '2022-02-01'].reset_index(drop=True)
+    ward_numbers = np.arange(len(df)) % wards + 1
+    ward = pd.Series(ward_numbers, dtype='Int64')
+    df['ward'] = ward.mask(df.index >= chunk_rows * 2)
+    return df
+
+
+def read_written(bucket) -> pd.DataFrame:
+    """Read file of January crimes from the bucket."""
+    to_path = lake_writer.gcs_path(crimes_spec, january, 'full')
+    return pd.read_parquet(os.path.join(bucket.root, to_path))
+
+
+def test_pipelined_matches_sequential(
+    monkeypatch,
+    local_bucket,
+    portal_csv,
+    crimes,
+):
+    """Both modes write the same rows, values and types."""
+    monkeypatch.setattr(portal_reader, 'chunk_size', chunk_rows)
+    serve_csv(crimes, portal_csv)
+
+    raw_df = ingest_tasks.download_partition.fn(crimes_spec, january)
+    clean_df = ingest_tasks.clean_partition.fn(raw_df, crimes_spec)
+    ingest_tasks.write_partition_to_gcs.fn(clean_df, crimes_spec, january)
+    sequential = read_written(local_bucket)
+    ingest_pipelined.ingest_partition_pipelined.fn(crimes_spec, january)
+    pipelined = read_written(local_bucket)
+
+    pd.testing.assert_frame_equal(pipelined, sequential)
+    assert pipelined['ward'].iloc[0] == '1'
+    assert pipelined['ward'].iloc[-1] == ''
@@ -0,0 +1,75 @@
+"""Tests of ingest in shards planned by row counts."""
+
+import functools
+import io
+
+import ingest_planned
+import pandas as pd
+import pytest
+from dataset_specs import crimes_spec
+from ingest_engine import IngestOptions
+from ingest_spec import dataset_partitions, full_profile
+from portal_reader import transferred_key
+from socrata import CountingReader, transferred_bytes
+
+months = dataset_partitions(crimes_spec, [2022])
+
+
+def _portal_answer(answer: bytes, data_url: str) -> io.BufferedReader:
+    return io.BufferedReader(CountingReader(io.BytesIO(answer)))
+
+
+def test_rows_split_between_months():
+    """Every row lands in exactly one month, the last second included."""
+    df = pd.DataFrame({
+        'id': [1, 2, 3, 4],
+        'date': [
+            '2022-01-01T00:00:00.000',
+            '2022-01-31T23:59:59.000',
+            '2022-01-31T23:59:59.500',
+            '2022-02-01T00:00:00.000',
+        ],
+    })
+    january = ingest_planned.partition_rows(df, crimes_spec, months[0])
+    february = ingest_planned.partition_rows(df, crimes_spec, months[1])
+
+    assert january['id'].tolist() == [1, 2, 3]
+    assert february['id'].tolist() == [4]
+    assert ingest_planned.partition_rows(df, crimes_spec, months[2]).empty
+
+
+def test_rows_of_empty_shard():
+    """Shard without rows gives no rows for any month."""
+    assert ingest_planned.partition_rows(
+        pd.DataFrame(),
+        crimes_spec,
+        months[0],
+    ).empty
+
+
+def test_count_query_not_counted_as_transfer(monkeypatch, local_bucket):
+    """Bytes of the row counts are not added to the transferred data."""
+    answer = b'day,n\n2022-01-01T00:00:00.000,10\n2022-02-01T00:00:00.000,5\n'
+    monkeypatch.setattr(
+        ingest_planned,
+        'open_url',
+        functools.partial(_portal_answer, answer),
+    )
+    counter_key = transferred_key(crimes_spec, full_profile)
+    transferred_bytes.pop(counter_key, None)
+
+    shards = ingest_planned.plan_year_shards.fn(crimes_spec, 2022)
+
+    assert sum(shard.rows for shard in shards) == 15
+    assert transferred_bytes[counter_key] == 0
+
+
+@pytest.mark.parametrize('modes', [
+    {'planned': True, 'pipelined': True},
+    {'planned': True, 'staged': True},
+    {'pipelined': True, 'staged': True},
+])
+def test_one_ingest_mode(modes):
+    """Modes that cannot run together are rejected."""
+    with pytest.raises(ValueError, match='Only one'):
+        IngestOptions(**modes)
@@ -0,0 +1,56 @@
+"""Tests of partition filters and links of dataset specs."""
+
+from urllib.parse import parse_qs, urlsplit
+
+from dataset_specs import crimes_profiles, crimes_spec, schools_spec
+from ingest_spec import Partition, full_profile, partition_url, partition_where
+
+january = Partition(
+    start='2022-01-01T00:00:00',
+    end='2022-01-31T23:59:59',
+    suffix='_2022_01',
+)
+january_where = (
+    "date between '2022-01-01T00:00:00' and '2022-01-31T23:59:59'"
+)
+street_profile = crimes_profiles['street']
+
+
+def _query(url: str) -> dict:
+    return parse_qs(urlsplit(url).query)
+
+
+def test_partition_where_of_full_profile():
+    """Full profile filters only the time range of the partition."""
+    assert partition_where(crimes_spec, january, full_profile) == january_where
+
+
+def test_partition_where_joins_profile_filter():
+    """Profile filter is added to the time range with and."""
+    where = partition_where(crimes_spec, january, 'street')
+    assert where == '{p} and {s}'.format(
+        p=january_where,
+        s=street_profile['where'],
+    )
+
+
+def test_partition_where_without_partition():
+    """Dataset without partitions is not filtered."""
+    assert not partition_where(schools_spec, Partition(), full_profile)
+
+
+def test_partition_url_of_street_profile():
+    """Portal gets the columns and the filters of the street profile."""
+    query = _query(partition_url(crimes_spec, january, 'street'))
+
+    assert query['$select'] == [','.join(street_profile['select'])]
+    assert query['$where'] == [partition_where(crimes_spec, january, 'street')]
+    assert query['$order'] == [':id']
+    assert query['$limit'] == [str(crimes_spec.page_limit)]
+
+
+def test_partition_url_of_full_profile():
+    """Full profile asks for every column."""
+    query = _query(partition_url(crimes_spec, january, full_profile))
+    assert '$select' not in query
+    assert query['$where'] == [january_where]
@@ -0,0 +1,185 @@
+"""Tests of lake queries against brute-force answers over every row."""
+
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+from dataset_specs import crimes_spec, schools_spec
+from grid_index import haversine_m
+from ingest_spec import Partition, dataset_partitions, full_profile
+from lake_files import FileCache, LocalFiles
+from lake_queries import Circle, Lake, crime_columns
+from lake_service import answer
+from lake_writer import gcs_path
+
+from tests.load.fake_socrata import synthetic_crimes, synthetic_schools
+
+year = 2022
+crimes = synthetic_crimes([year], 30)[list(crime_columns)]
+located_crimes = crimes.dropna(subset=['latitude', 'longitude'])
+schools = synthetic_schools(40)
+months = dataset_partitions(crimes_spec, [year])
+
+
+def _write(df: pd.DataFrame, root: str, path: str) -> None:
+    local_path = os.path.join(root, path)
+    os.makedirs(os.path.dirname(local_path), exist_ok=True)
+    df.to_parquet(local_path, index=False)
+
+
+def _month_path(month: int) -> str:
+    return gcs_path(crimes_spec, months[month - 1], full_profile)
+
+
+def _month_crimes(month: int) -> pd.DataFrame:
+    return crimes[crimes['date'].dt.month == month]
+
+
+def _write_lake(root: str) -> None:
+    for month in range(1, len(months) + 1):
+        _write(_month_crimes(month), root, _month_path(month))
+    _write(schools, root, gcs_path(schools_spec, Partition(), full_profile))
+
+
+def _lake(root: str, check_seconds: float = 0) -> Lake:
+    return Lake(FileCache(LocalFiles(root), check_seconds=check_seconds))
+
+
+def _days_ids(days: tuple[str, str]) -> pd.DataFrame:
+    start = pd.Timestamp(days[0])
+    end = pd.Timestamp(days[1]) + pd.Timedelta(days=1)
+    dates = located_crimes['date']
+    return located_crimes[dates.between(start, end, inclusive='left')]
+
+
+def _brute_force_ids(days: tuple[str, str], circle: Circle) -> set[int]:
+    in_days = _days_ids(days)
+    distances = haversine_m(
+        circle.lat,
+        circle.lon,
+        in_days['latitude'].to_numpy(),
+        in_days['longitude'].to_numpy(),
+    )
+    return set(in_days['id'][distances <= circle.radius])
+
+
+def _touch(root: str, path: str, seconds: int) -> None:
+    """Set modification time, so a rewrite is seen on coarse file systems."""
+    local_path = os.path.join(root, path)
+    os.utime(local_path, (seconds, seconds))
+
+
+@pytest.fixture
+def lake_root(tmp_path) -> str:
+    """Local datalake with crimes of every month and schools."""
+    root = str(tmp_path / 'lake')
+    _write_lake(root)
+    return root
+
+
+@pytest.mark.parametrize('radius', [50, 400, 2000, 20000])
+@pytest.mark.parametrize('days', [
+    ('2022-01-20', '2022-03-05'),
+    ('2022-06-15', '2022-06-15'),
+])
+def test_radius_query_matches_brute_force(lake_root, radius, days):
+    """Grid index finds the same crimes as distances to every crime."""
+    lake = _lake(lake_root)
+    centers = _days_ids(days).sample(4, random_state=3)
+    for crime in centers.itertuples():
+        circle = Circle(crime.latitude, crime.longitude, radius)
+        found = lake.crimes(days, circle)
+
+        assert set(found['id']) == _brute_force_ids(days, circle)
+        assert found['distance_m'].is_monotonic_increasing
+
+
+def test_date_query_matches_brute_force(lake_root):
+    """Crimes with coordinates of every day in range are returned."""
+    days = ('2022-02-27', '2022-04-02')
+    found = _lake(lake_root).crimes(days)
+    assert set(found['id']) == set(_days_ids(days)['id'])
+
+
+def test_nearest_schools_match_brute_force(lake_root):
+    """Nearest schools are the first ones by distance to every school."""
+    lat, lon = 41.85, -87.65
+    distances = haversine_m(lat, lon, schools['lat'], schools['long'])
+    nearest = np.argsort(distances)[:5]
+    expected = schools['school_id'].to_numpy()[nearest]
+
+    found = _lake(lake_root).nearest_schools(lat, lon, 5)
+
+    assert found['school_id'].tolist() == expected.tolist()
+
+
+def test_changed_file_read_again(lake_root):
+    """Month written again is read again once its version is checked."""
+    lake = _lake(lake_root)
+    days = ('2022-01-01', '2022-01-31')
+    assert len(lake.crimes(days)) == len(_days_ids(days))
+    assert len(lake.crimes(days)) == len(_days_ids(days))
+    assert lake.cache.hits == 1
+
+    _write(_month_crimes(1).iloc[:10], lake_root, _month_path(1))
+    _touch(lake_root, _month_path(1), 1000)
+
+    assert len(lake.crimes(days)) <= 10
+    assert lake.cache.misses == 2
+
+
+def test_file_checked_after_check_seconds(lake_root):
+    """Cached month is used without checking its file until it is due."""
+    lake = _lake(lake_root, check_seconds=3600)
+    days = ('2022-01-01', '2022-01-31')
+    rows = len(lake.crimes(days))
+
+    _write(_month_crimes(1).iloc[:10], lake_root, _month_path(1))
+    _touch(lake_root, _month_path(1), 1000)
+
+    assert len(lake.crimes(days)) == rows
+
+
+def test_missing_file_not_cached(lake_root):
+    """Month missing at the first query is found once it is written."""
+    os.remove(os.path.join(lake_root, _month_path(2)))
+    lake = _lake(lake_root, check_seconds=3600)
+    days = ('2022-02-01', '2022-02-28')
+    assert lake.crimes(days).empty
+
+    _write(_month_crimes(2), lake_root, _month_path(2))
+
+    assert len(lake.crimes(days)) == len(_days_ids(days))
+
+
+def test_answer_of_request_path(lake_root):
+    """Request paths run their queries, unknown paths are not found."""
+    lake = _lake(lake_root)
+    school_id = schools['school_id'].iloc[0]
+    nearest = answer(lake, '/schools/nearest?lat=41.85&lon=-87.65&k=3')
+    near_school = answer(
+        lake,
+        '/schools/{s}/crimes?radius=100000&end=2022-03-31'.format(s=school_id),
+    )
+
+    first_quarter = _days_ids(('2022-01-01', '2022-03-31'))
+    assert len(nearest['rows']) == 3
+    found_ids = {row['id'] for row in near_school['rows']}
+    assert found_ids == set(first_quarter['id'])
+    with pytest.raises(LookupError):
+        answer(lake, '/unknown')
+
+
+def test_school_crimes_of_last_days(lake_root):
+    """Window of days ends on the end day and has exactly days days."""
+    school_id = schools['school_id'].iloc[0]
+    found = answer(
+        _lake(lake_root),
+        '/schools/{s}/crimes?radius=100000&days=2&end=2022-03-02'.format(
+            s=school_id,
+        ),
+    )
+
+    found_ids = {row['id'] for row in found['rows']}
+    assert found_ids == set(_days_ids(('2022-03-01', '2022-03-02'))['id'])
@@ -0,0 +1,51 @@
+"""Tests of datalake paths against the old extract flows."""
+
+import pytest
+from dataset_specs import crimes_spec, schools_spec
+from ingest_spec import dataset_partitions, full_profile
+from lake_writer import gcs_path
+
+months_in_year = 12
+
+
+def test_crimes_paths_match_old_flow(monkeypatch):
+    """Monthly crimes files keep the names of the old extract flow."""
+    monkeypatch.delenv(crimes_spec.gcs_path_env, raising=False)
+    monkeypatch.delenv(crimes_spec.gcs_file_env, raising=False)
+    paths = [
+        gcs_path(crimes_spec, partition, full_profile)
+        for partition in dataset_partitions(crimes_spec, [2022])
+    ]
+    assert paths == [
+        'data/crimes/chicago_crimes__2022_{m:02d}.parquet'.format(m=month)
+        for month in range(1, months_in_year + 1)
+    ]
+
+
+@pytest.mark.parametrize(('env', 'expected'), [
+    ({}, 'data/chicago_schools.parquet'),
+    (
+        {
+            'GCS_BUCKET_SCHOOLS_PATH': 'lake/',
+            'GCS_BUCKET_SCHOOLS_FILE_NAME': 'schools',
+        },
+        'lake/schools.parquet',
+    ),
+])
+def test_schools_path_match_old_flow(monkeypatch, env, expected):
+    """Schools file and its env overrides are the same as before."""
+    monkeypatch.delenv(schools_spec.gcs_path_env, raising=False)
+    monkeypatch.delenv(schools_spec.gcs_file_env, raising=False)
+    for env_name, env_value in env.items():
+        monkeypatch.setenv(env_name, env_value)
+    partition = dataset_partitions(schools_spec, [])[0]
+    assert gcs_path(schools_spec, partition, full_profile) == expected
+
+
+def test_profile_files_in_subfolder(monkeypatch):
+    """Files of other profiles do not replace files of the full profile."""
+    monkeypatch.setenv(crimes_spec.gcs_path_env, 'data/crimes/')
+    monkeypatch.setenv(crimes_spec.gcs_file_env, 'chicago_crimes_')
+    partition = dataset_partitions(crimes_spec, [2023])[0]
+    to_path = gcs_path(crimes_spec, partition, 'street')
+    assert to_path == 'data/crimes/street/chicago_crimes__2023_01.parquet'
@@ -0,0 +1,99 @@
+"""Tests of the streaming pipeline."""
+
+import operator
+
+import pytest
+from pipeline import StageError, run_pipeline, worker_pool
+
+elements = 20
+queue_size = 2
+workers = 2
+
+
+class Recorder(object):
+    """Count elements taken from the source and passed to the sink."""
+
+    def __init__(self) -> None:
+        """Start with nothing passed."""
+        self.produced = 0
+        self.read_ahead: list[int] = []
+
+    def produce(self, number: int) -> int:
+        """Pass number on from the source."""
+        self.produced += 1
+        return number
+
+    def sink(self, _: int) -> None:
+        """Remember how far the source is ahead of the sink."""
+        self.read_ahead.append(self.produced - len(self.read_ahead))
+
+
+def _failing_source():
+    yield from range(3)
+    raise OSError('connection reset')
+
+
+def _failing_sink(_: int) -> None:
+    raise RuntimeError('disk full')
+
+
+def test_elements_in_source_order():
+    """Elements come out transformed and in source order."""
+    sunk = []
+
+    passed = run_pipeline(
+        source=range(elements),
+        transform=operator.neg,
+        sink=sunk.append,
+        queue_size=queue_size,
+    )
+
+    assert passed == elements
+    assert sunk == [-number for number in range(elements)]
+
+
+def test_pool_shared_between_pipelines():
+    """Pool passed in is left running for the next pipeline."""
+    sunk = []
+
+    with worker_pool(workers) as pool:
+        for _ in range(2):
+            run_pipeline(range(elements), operator.neg, sunk.append, pool=pool)
+
+    assert len(sunk) == 2 * elements
+    assert sunk[elements:] == sunk[:elements]
+
+
+def test_source_is_throttled():
+    """A slow sink throttles the source instead of buffering everything."""
+    recorder = Recorder()
+    source = map(recorder.produce, range(elements))
+
+    with worker_pool(workers) as pool:
+        run_pipeline(source, operator.neg, recorder.sink, queue_size, pool)
+
+    # both queues, futures in flight and elements held by the two threads
+    assert max(recorder.read_ahead) <= 2 * queue_size + workers + 2
+
+
+def test_source_failure_is_raised():
+    """Error of the producer thread is raised in the calling thread."""
+    sunk = []
+
+    with pytest.raises(StageError) as error_info:
+        run_pipeline(_failing_source(), operator.neg, sunk.append)
+
+    assert isinstance(error_info.value.__cause__, OSError)  # noqa: WPS441
+    assert sunk == [0, -1, -2]
+
+
+def test_transform_failure_is_raised():
+    """Error of a worker is raised when its result reaches the sink."""
+    with pytest.raises(ValueError, match='invalid literal'):
+        run_pipeline(['1', 'x', '3'], int, [].append)
+
+
+def test_sink_failure_stops_stages():
+    """Error of the sink stops the other stages instead of hanging."""
+    with pytest.raises(RuntimeError, match='disk full'):
+        run_pipeline(range(elements), operator.neg, _failing_sink)
@@ -0,0 +1,104 @@
+"""Tests of reading and cleaning portal row data against the old extract flows."""
+
+import dataset_specs
+import pandas as pd
+import pytest
+from portal_reader import clean_chunk, csv_dtypes
+
+from tests.conftest import serve_csv
+from tests.load.fake_socrata import synthetic_crimes, synthetic_schools
+
+# numbers with leading zeros lost them in files written before the engine
+leading_zero_columns = ('iucr', 'beat', 'district', 'fbi_code')
+
+
+def clean_crimes_before_engine(df: pd.DataFrame) -> pd.DataFrame:
+    """Clean crimes as the extract flow did before the ingest engine."""
+    df = df[df[['latitude']].notnull().all(1)]
+    df = df[df[['longitude']].notnull().all(1)]
+    df = df.fillna('')
+    return df.astype(dataset_specs.crimes_schema)
+
+
+def clean_schools_before_engine(df: pd.DataFrame) -> pd.DataFrame:
+    """Clean schools as the extract flow did before the ingest engine."""
+    return df.astype(dataset_specs.schools_schema)
+
+
+@pytest.mark.parametrize(('spec', 'portal_df', 'clean_before_engine'), [
+    (
+        dataset_specs.crimes_spec,
+        synthetic_crimes([2022], 2),
+        clean_crimes_before_engine,
+    ),
+    (
+        dataset_specs.schools_spec,
+        synthetic_schools(50),
+        clean_schools_before_engine,
+    ),
+])
+def test_clean_chunk_keeps_rows_and_types(
+    tmp_path,
+    spec,
+    portal_df,
+    clean_before_engine,
+):
+    """Engine keeps the rows, types and values apart from text numbers."""
+    csv_path = tmp_path / 'portal.csv'
+    serve_csv(portal_df, csv_path)
+
+    expected = clean_before_engine(pd.read_csv(csv_path))
+    cleaned = clean_chunk(pd.read_csv(csv_path, dtype=csv_dtypes(spec)), spec)
+
+    pd.testing.assert_series_equal(cleaned.dtypes, expected.dtypes)
+    pd.testing.assert_frame_equal(
+        cleaned.drop(columns=list(leading_zero_columns), errors='ignore'),
+        expected.drop(columns=list(leading_zero_columns), errors='ignore'),
+    )
+
+
+def test_text_numbers_differ_from_old_files(tmp_path):
+    """Beat keeps its leading zero and ward with missing values has no .0."""
+    csv_path = tmp_path / 'portal.csv'
+    portal_df = synthetic_crimes([2022], 1)
+    portal_df.loc[0, 'ward'] = None
+    serve_csv(portal_df, csv_path)
+
+    spec = dataset_specs.crimes_spec
+    before = clean_crimes_before_engine(pd.read_csv(csv_path))
+    cleaned = clean_chunk(pd.read_csv(csv_path, dtype=csv_dtypes(spec)), spec)
+
+    assert set(before['beat']) == {'111'}
+    assert set(cleaned['beat']) == {'0111'}
+    assert set(before['ward']) == {'', '42.0'}
+    assert set(cleaned['ward']) == {'', '42'}
+
+
+def test_clean_chunk_keeps_leading_zeros(tmp_path):
+    """Text columns keep their text, e.g. beat '0111' is not read as 111."""
+    csv_path = tmp_path / 'portal.csv'
+    serve_csv(synthetic_crimes([2022], 1), csv_path)
+
+    spec = dataset_specs.crimes_spec
+    raw_df = pd.read_csv(csv_path, dtype=csv_dtypes(spec))
+    cleaned = clean_chunk(raw_df, spec)
+
+    assert set(cleaned['beat']) == {'0111'}
+    assert not cleaned[['latitude', 'longitude']].isna().any(axis=None)
+
+
+def test_clean_chunk_of_street_profile(tmp_path):
+    """Columns of the street profile get their types, the rest stay absent."""
+    street_columns = dataset_specs.crimes_profiles['street']['select']
+    csv_path = tmp_path / 'portal.csv'
+    serve_csv(synthetic_crimes([2022], 2)[street_columns], csv_path)
+
+    spec = dataset_specs.crimes_spec
+    raw_df = pd.read_csv(csv_path, dtype=csv_dtypes(spec))
+    cleaned = clean_chunk(raw_df, spec)
+
+    assert cleaned.columns.tolist() == street_columns
+    assert cleaned.dtypes.to_dict() == {
+        column: dataset_specs.crimes_schema[column] for column in street_columns
+    }
+    assert len(cleaned) == len(raw_df.dropna(subset=['latitude', 'longitude']))
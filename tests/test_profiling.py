@@ -0,0 +1,120 @@
+"""Tests of opt-in task profiling."""
+
+import functools
+import logging
+import os
+import threading
+import time
+
+import profiling
+import pytest
+from flame_graph import flame_graph, folded_stacks
+from profilers import SamplingProfiler
+
+stacks = {'main;load': 3, 'main;load;parse': 2}
+
+
+@pytest.fixture
+def profile_dir(monkeypatch, tmp_path) -> str:
+    """Save profiles to a temporary directory, no flow run context."""
+    monkeypatch.setattr(profiling, 'output_dir', str(tmp_path))
+    monkeypatch.setattr(
+        profiling,
+        'get_run_logger',
+        functools.partial(logging.getLogger, __name__),
+    )
+    monkeypatch.setattr(profiling, 'create_markdown_artifact', _no_artifact)
+    monkeypatch.delenv(profiling.PROFILE_BUCKET_PATH, raising=False)
+    return str(tmp_path)
+
+
+def _no_artifact(**kwargs) -> None:
+    """Skip artifact outside of a flow run."""
+
+
+def _failing_artifact(**kwargs) -> None:
+    raise RuntimeError('API unreachable')
+
+
+def _busy_wait(seconds: float) -> None:
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        time.sleep(0)
+
+
+@profiling.profiled
+def _add(first: int, second: int) -> int:
+    return first + second
+
+
+@pytest.mark.parametrize(('env_value', 'mode'), [
+    ('', ''),
+    ('0', ''),
+    ('false', ''),
+    ('1', profiling.sampling_mode),
+    ('True', profiling.sampling_mode),
+    ('sampling', profiling.sampling_mode),
+    ('deterministic', profiling.deterministic_mode),
+])
+def test_mode_from_env(monkeypatch, env_value, mode):
+    """Switch values of PROFILE_TASKS turn sampling on or profiling off."""
+    monkeypatch.setenv(profiling.PROFILE_TASKS, env_value)
+    assert profiling.get_mode() == mode
+
+
+def test_unknown_mode_in_env(monkeypatch):
+    """Misspelled mode is reported instead of switching profiling off."""
+    monkeypatch.setenv(profiling.PROFILE_TASKS, 'sampled')
+    with pytest.raises(ValueError, match='PROFILE_TASKS'):
+        profiling.get_mode()
+
+
+@pytest.mark.parametrize(('mode', 'suffixes'), [
+    (profiling.sampling_mode, {'.folded', '.svg'}),
+    (profiling.deterministic_mode, {'.prof', '.txt'}),
+])
+def test_profile_files_saved(monkeypatch, profile_dir, mode, suffixes):
+    """Every mode saves its files and keeps the result."""
+    monkeypatch.setenv(profiling.PROFILE_TASKS, mode)
+    assert _add(1, 2) == 3
+    saved = {
+        os.path.splitext(file_name)[1]
+        for file_name in os.listdir(profile_dir)
+    }
+    assert saved == suffixes
+
+
+def test_failed_report_keeps_result(monkeypatch, profile_dir):
+    """Failing artifact API does not fail the profiled task."""
+    monkeypatch.setenv(profiling.PROFILE_TASKS, profiling.sampling_mode)
+    monkeypatch.setattr(
+        profiling,
+        'create_markdown_artifact',
+        _failing_artifact,
+    )
+    assert _add(1, 2) == 3
+
+
+def test_folded_stacks():
+    """Stacks are written one per line with their sample counts."""
+    assert folded_stacks(stacks) == 'main;load 3\nmain;load;parse 2\n'
+
+
+def test_flame_graph_has_frame_per_node():
+    """Shared frames are merged into one rectangle."""
+    svg = flame_graph(stacks)
+    assert svg.count('<rect') == 4
+    assert 'parse (2 samples)' in svg
+
+
+def test_started_threads_sampled():
+    """Threads started by the profiled code are sampled under their name."""
+    worker = threading.Thread(name='stage', target=_busy_wait, args=(0.2,))
+    profiler = SamplingProfiler(interval=0.001)
+    with profiler:
+        worker.start()
+        worker.join()
+
+    sampled = list(profiler.stacks)
+    assert any(stack.startswith('stage;') for stack in sampled)
+    assert any('_busy_wait' in stack for stack in sampled)
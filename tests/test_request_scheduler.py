@@ -0,0 +1,221 @@
+"""Tests of the token bucket, AIMD limits and retries of portal requests."""
+
+import io
+import time
+from email.utils import formatdate
+from http.client import IncompleteRead
+from urllib.error import HTTPError
+
+import pytest
+import request_scheduler
+
+body = b'1,2022-01-01\n' * 100
+
+settings = request_scheduler.SchedulerSettings(
+    rate=10,
+    burst=2,
+    max_in_flight=8,
+    target_latency=1,
+    retries=2,
+    backoff=0,
+)
+
+
+class BrokenBody(io.BytesIO):
+    """Response whose body breaks after the given number of bytes."""
+
+    def __init__(self, answer: bytes, broken_at: int) -> None:
+        """Serve answer until broken_at bytes are read."""
+        super().__init__(answer)
+        self._broken_at = broken_at
+
+    def readinto(self, buffer) -> int:
+        """Read until the broken part is reached.
+
+        Raises:
+            IncompleteRead: broken part is reached.
+        """
+        if self.tell() >= self._broken_at:
+            raise IncompleteRead(b'')
+        view = memoryview(buffer)[:self._broken_at - self.tell()]
+        return super().readinto(view)
+
+
+class SlowBody(io.BytesIO):
+    """Response whose headers are fast and body is slow."""
+
+    def readinto(self, buffer) -> int:
+        """Read after a pause longer than the target latency."""
+        time.sleep(0.05)
+        return super().readinto(buffer)
+
+
+class FakePortal(object):
+    """Stand-in of urlopen giving prepared answers in order."""
+
+    def __init__(self, answers: list, header_delay: float = 0) -> None:
+        """Keep answers, errors among them are raised."""
+        self._answers = answers
+        self._header_delay = header_delay
+
+    def urlopen(self, url: str, timeout: float):
+        """Give the next answer after the header delay.
+
+        Raises:
+            answer: next answer is an error.
+        """
+        time.sleep(self._header_delay)
+        answer = self._answers.pop(0)
+        if isinstance(answer, HTTPError):
+            raise answer
+        return answer
+
+
+def _http_error(status: int, headers: dict) -> HTTPError:
+    return HTTPError('http://portal', status, 'error', headers, None)
+
+
+def _serve(monkeypatch, answers: list, header_delay: float = 0) -> None:
+    portal = FakePortal(answers, header_delay)
+    monkeypatch.setattr(request_scheduler, 'urlopen', portal.urlopen)
+
+
+def test_bucket_waits_for_refill():
+    """Burst is served at once, the next token waits for the refill rate."""
+    bucket = request_scheduler.TokenBucket(burst=2, now=0)
+    for _ in range(2):
+        assert bucket.wait_time(rate=4, now=0) == 0
+        bucket.take()
+
+    assert bucket.wait_time(rate=4, now=0) == pytest.approx(0.25)
+    assert bucket.wait_time(rate=4, now=0.25) == 0
+    assert bucket.wait_time(rate=4, now=100) == 0
+    assert bucket.tokens == 2
+
+
+def test_bucket_paused():
+    """Paused bucket gives no tokens until the pause ends."""
+    bucket = request_scheduler.TokenBucket(burst=2, now=0)
+    bucket.pause(5)
+    bucket.pause(3)
+
+    assert bucket.wait_time(rate=4, now=1) == 4
+    assert bucket.wait_time(rate=4, now=5) == 0
+
+
+def test_aimd_grows_additively_up_to_maximum():
+    """Fast answers add one request per round of limit, up to maximum."""
+    aimd = request_scheduler.Aimd(settings)
+    assert aimd.limit == 4
+    aimd.increase()
+    assert aimd.limit == pytest.approx(4.25)
+    for _ in range(100):
+        aimd.increase()
+    assert aimd.limit == settings.max_in_flight
+    assert aimd.rate == settings.rate
+
+
+def test_aimd_halves_once_per_round():
+    """Failures of one round cut limit and rate by half only once."""
+    aimd = request_scheduler.Aimd(settings)
+    aimd.decrease(now=10)
+    aimd.decrease(now=10.5)
+    assert aimd.limit == 2
+    assert aimd.rate == 5
+
+    for second in range(12, 30, 2):
+        aimd.decrease(now=second)
+    assert aimd.limit == settings.min_in_flight
+    assert aimd.rate == settings.min_rate
+
+
+@pytest.mark.parametrize(('header', 'expected'), [
+    (None, 0),
+    ('', 0),
+    ('7', 7),
+    ('not a date', 0),
+])
+def test_retry_after_seconds(header, expected):
+    """Retry-After in seconds is read, missing or broken one is ignored."""
+    assert request_scheduler.retry_after_seconds(header) == expected
+
+
+def test_retry_after_date():
+    """Retry-After as HTTP date gives seconds until that time."""
+    header = formatdate(time.time() + 30, usegmt=True)
+    seconds = request_scheduler.retry_after_seconds(header)
+    assert 28 < seconds <= 30
+
+
+def test_retry_after_pauses_requests(monkeypatch):
+    """Throttled answer is retried after the pause asked by the portal."""
+    _serve(monkeypatch, [_http_error(429, {'Retry-After': '1'}), io.BytesIO()])
+    scheduler = request_scheduler.RequestScheduler(settings)
+
+    started = time.monotonic()
+    scheduler.request('http://portal')
+
+    assert round(time.monotonic() - started) >= 1
+    assert scheduler.throttled == 1
+    assert scheduler.retried == 1
+    # halved by the throttled answer, grown by the answer after the pause
+    assert scheduler.aimd.limit == pytest.approx(2.5)
+
+
+def test_error_not_retried(monkeypatch):
+    """Answer that is not a retry status is raised and frees its slot."""
+    _serve(monkeypatch, [_http_error(404, {})])
+    scheduler = request_scheduler.RequestScheduler(settings)
+
+    with pytest.raises(HTTPError):
+        scheduler.request('http://portal')
+    assert scheduler.in_flight == 0
+    assert scheduler.retried == 0
+
+
+def test_broken_body_read_again(monkeypatch):
+    """Body that breaks is requested again and continued where it broke."""
+    _serve(monkeypatch, [BrokenBody(body, 100), io.BytesIO(body)])
+    scheduler = request_scheduler.RequestScheduler(settings)
+
+    with request_scheduler.ScheduledResponse(scheduler, 'http://portal') as raw:
+        assert io.BufferedReader(raw, buffer_size=64).read() == body
+
+    assert scheduler.retried == 1
+    assert scheduler.requests == 2
+    assert scheduler.in_flight == 0
+
+
+def test_broken_body_raised_after_retries(monkeypatch):
+    """Body that keeps breaking is raised once retries are used up."""
+    _serve(monkeypatch, [BrokenBody(body, 10) for _ in range(3)])
+    scheduler = request_scheduler.RequestScheduler(settings)
+
+    with request_scheduler.ScheduledResponse(scheduler, 'http://portal') as raw:
+        with pytest.raises(IncompleteRead):
+            raw.read()
+    assert scheduler.in_flight == 0
+
+
+@pytest.mark.parametrize(('header_delay', 'answer', 'limit'), [
+    (0.05, io.BytesIO(body), 2),
+    (0, SlowBody(body), 4.25),
+])
+def test_latency_until_headers(monkeypatch, header_delay, answer, limit):
+    """Slow headers cut the limit, a slow body read does not."""
+    _serve(monkeypatch, [answer], header_delay)
+    slow_settings = request_scheduler.SchedulerSettings(
+        rate=10,
+        burst=2,
+        max_in_flight=8,
+        target_latency=0.01,
+        retries=0,
+        backoff=0,
+    )
+    scheduler = request_scheduler.RequestScheduler(slow_settings)
+
+    with request_scheduler.ScheduledResponse(scheduler, 'http://portal') as raw:
+        raw.read()
+
+    assert scheduler.aimd.limit == pytest.approx(limit)
+    assert scheduler.in_flight == 0
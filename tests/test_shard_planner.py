@@ -0,0 +1,71 @@
+"""Tests of planning fetch shards from row counts by day."""
+
+import datetime
+
+import pytest
+from shard_planner import plan_shards
+
+year = 2022
+target_rows = 100
+
+
+def _days(first: str, last: str) -> list[str]:
+    start = datetime.date.fromisoformat(first)
+    count = (datetime.date.fromisoformat(last) - start).days + 1
+    return [
+        (start + datetime.timedelta(days=number)).isoformat()
+        for number in range(count)
+    ]
+
+
+def _covered_days(shards) -> list[str]:
+    return [
+        day
+        for shard in shards
+        for day in _days(shard.start[:10], shard.end[:10])
+    ]
+
+
+def _fits_target(shard) -> bool:
+    one_day = shard.start[:10] == shard.end[:10]
+    return shard.rows <= target_rows or one_day
+
+
+@pytest.mark.parametrize('day_counts', [
+    {},
+    {'2022-03-15': 5},
+    dict.fromkeys(_days('2022-01-01', '2022-12-31'), 7),
+    {'2022-06-01': 1000, '2022-06-02': 3, '2022-11-30': 60},
+])
+def test_shards_cover_every_day_once(day_counts):
+    """Shards are in order, without gaps or overlaps, over the whole year."""
+    shards = plan_shards(day_counts, [year], target_rows)
+    assert _covered_days(shards) == _days('2022-01-01', '2022-12-31')
+    assert sum(shard.rows for shard in shards) == sum(day_counts.values())
+
+
+def test_busy_month_split_into_days():
+    """Month over the target is split, a single busy day stays one shard."""
+    day_counts = dict.fromkeys(_days('2022-05-01', '2022-05-31'), 30)
+    day_counts['2022-05-10'] = 500
+    shards = plan_shards(day_counts, [year], target_rows)
+    may_shards = [shard for shard in shards if shard.start.startswith('2022-05')]
+
+    assert len(may_shards) > 1
+    assert all(_fits_target(shard) for shard in may_shards)
+    assert any(shard.rows == 500 for shard in may_shards)
+
+
+def test_quiet_months_merged():
+    """Consecutive small months are fetched by one shard."""
+    day_counts = {'2022-01-05': 10, '2022-02-05': 10, '2022-03-05': 10}
+    shards = plan_shards(day_counts, [year], target_rows)
+    assert len(shards) == 1
+    assert shards[0].rows == 30
+
+
+def test_shards_start_and_end_on_day_boundaries():
+    """Rows added during the day after planning are still fetched."""
+    shards = plan_shards({'2022-07-04': 150}, [year], target_rows)
+    assert all(shard.start.endswith('T00:00:00') for shard in shards)
+    assert all(shard.end.endswith('T23:59:59') for shard in shards)
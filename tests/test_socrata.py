@@ -0,0 +1,48 @@
+"""Tests of SoQL resource links."""
+
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+from socrata import build_url, default_limit
+
+resource = 'https://data.example.org/resource/abcd-1234.csv'
+
+
+def test_clauses_are_encoded():
+    """Select is joined with bare commas, spaces and quotes are escaped."""
+    url = build_url(
+        resource,
+        select=['id', 'date'],
+        where="date > '2022-01-01'",
+    )
+
+    assert url == '&'.join([
+        '{r}?$select=id,date'.format(r=resource),
+        '$where=date%20%3E%20%272022-01-01%27',  # noqa: WPS323
+        '$limit={l}'.format(l=default_limit),
+    ])
+
+
+def test_clauses_round_trip():
+    """Portal decodes every clause back to its SoQL text."""
+    where = "location_description = 'STREET' and latitude != 0"
+
+    query = parse_qs(urlsplit(build_url(resource, where=where, offset=5)).query)
+
+    assert query == {
+        '$where': [where],
+        '$limit': [str(default_limit)],
+        '$offset': ['5'],
+    }
+
+
+def test_empty_clauses_left_out():
+    """Full profile without columns and filter asks only for the limit."""
+    url = build_url(resource, select=[], where='', limit=10)
+    assert url == '{r}?$limit=10'.format(r=resource)
+
+
+def test_unknown_clause_rejected():
+    """Misspelled clause is an error instead of being sent to the portal."""
+    with pytest.raises(ValueError, match='having'):
+        build_url(resource, having='count(*) > 1')
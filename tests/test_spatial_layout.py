@@ -0,0 +1,124 @@
+"""Tests of the Hilbert curve order and row group pruning of parquet files."""
+
+import json
+
+import numpy as np
+import pyarrow as pa
+import spatial_layout
+from pyarrow import parquet as pq
+
+order = 4
+side = 1 << order
+row_group_size = 64
+box = (-87.7, 41.8, -87.65, 41.85)
+
+
+def _grid() -> tuple[np.ndarray, np.ndarray]:
+    cells = np.arange(side)
+    x_cells, y_cells = np.meshgrid(cells, cells)
+    return x_cells.ravel(), y_cells.ravel()
+
+
+def _crimes_table(rows: int) -> pa.Table:
+    generator = np.random.default_rng(7)
+    return pa.table({
+        'id': np.arange(rows),
+        'longitude': generator.uniform(-87.9, -87.5, rows),
+        'latitude': generator.uniform(41.6, 42, rows),
+    })
+
+
+def _in_box(longitude, latitude) -> bool:
+    inside_x = box[0] <= longitude <= box[2]
+    return inside_x and box[1] <= latitude <= box[3]
+
+
+def _group_overlaps(group_box: list[float]) -> bool:
+    x_min, y_min, x_max, y_max = group_box
+    overlaps_x = x_min <= box[2] and x_max >= box[0]
+    return overlaps_x and y_min <= box[3] and y_max >= box[1]
+
+
+def _group_boxes(path: str) -> list[list[float]]:
+    metadata = pq.ParquetFile(path).metadata
+    group_boxes = []
+    for index in range(metadata.num_row_groups):
+        longitude = metadata.row_group(index).column(1).statistics
+        latitude = metadata.row_group(index).column(2).statistics
+        group_boxes.append(
+            [longitude.min, latitude.min, longitude.max, latitude.max],
+        )
+    return group_boxes
+
+
+def _write(table: pa.Table, path: str) -> None:
+    spatial_layout.write_spatial_parquet(
+        table,
+        path,
+        'longitude',
+        'latitude',
+        row_group_size,
+    )
+
+
+def _ids_in_box(rows: list[dict]) -> set[int]:
+    return {
+        row['id']
+        for row in rows
+        if _in_box(row['longitude'], row['latitude'])
+    }
+
+
+def test_hilbert_key_is_bijection():
+    """Every cell of the grid gets its own distance along the curve."""
+    x_cells, y_cells = _grid()
+    keys = spatial_layout.hilbert_key(x_cells, y_cells, order)
+    assert sorted(keys) == list(range(side * side))
+
+
+def test_hilbert_neighbours_adjacent():
+    """Cells following each other on the curve share a side."""
+    x_cells, y_cells = _grid()
+    curve = np.argsort(spatial_layout.hilbert_key(x_cells, y_cells, order))
+    x_steps = np.abs(np.diff(x_cells[curve]))
+    y_steps = np.abs(np.diff(y_cells[curve]))
+    assert (x_steps + y_steps == 1).all()
+
+
+def test_rows_without_coordinates_last():
+    """Sorting keeps every row and puts rows without coordinates at the end."""
+    table = _crimes_table(100)
+    missing = table['id'].to_numpy() < 5
+    longitude = pa.array(table['longitude'].to_numpy(), mask=missing)
+    table = table.set_column(1, 'longitude', longitude)
+    ordered = spatial_layout.spatial_sort(table, 'longitude', 'latitude')
+    ids = ordered['id'].to_pylist()
+
+    assert sorted(ids) == list(range(100))
+    assert ids[95:] == [0, 1, 2, 3, 4]
+
+
+def test_row_groups_pruned_by_box(tmp_path):
+    """Few row groups overlap a small box and they hold all of its rows."""
+    table = _crimes_table(row_group_size * 32)
+    path = str(tmp_path / 'crimes.parquet')
+    _write(table, path)
+    kept = [
+        index
+        for index, group_box in enumerate(_group_boxes(path))
+        if _group_overlaps(group_box)
+    ]
+    kept_rows = pq.ParquetFile(path).read_row_groups(kept).to_pylist()
+
+    assert len(kept) < 8
+    assert _ids_in_box(kept_rows) == _ids_in_box(table.to_pylist())
+
+
+def test_bbox_metadata_matches_statistics(tmp_path):
+    """Footer bounding boxes agree with the row group statistics."""
+    path = str(tmp_path / 'crimes.parquet')
+    _write(_crimes_table(row_group_size * 4), path)
+    metadata = pq.ParquetFile(path).schema_arrow.metadata
+    layout = json.loads(metadata[spatial_layout.metadata_key])
+
+    assert np.allclose(layout['row_group_bboxes'], _group_boxes(path))
@@ -0,0 +1,91 @@
+"""Tests of the local staging area."""
+
+import os
+
+import pyarrow as pa
+import pytest
+import staging
+
+flow_run_env = 'PREFECT__FLOW_RUN_ID'
+raw_name = 'crimes_raw'
+
+
+@pytest.fixture
+def staging_dir(monkeypatch, tmp_path) -> str:
+    """Stage to a temporary directory."""
+    monkeypatch.setattr(staging, 'staging_dir', str(tmp_path))
+    return str(tmp_path)
+
+
+def _table(number: int) -> pa.Table:
+    numbers = pa.array([number], type=pa.int64())
+    return pa.table({'n': numbers})
+
+
+def _raw_file() -> staging.StagedFile:
+    return staging.StagedFile(raw_name)
+
+
+def test_flow_runs_do_not_share_files(monkeypatch, staging_dir):
+    """Concurrent flow runs stage the same name to different files."""
+    monkeypatch.setenv(flow_run_env, 'first-run')
+    first_path = _raw_file().write_table(_table(1))
+    monkeypatch.setenv(flow_run_env, 'second-run')
+    assert not _raw_file().is_fresh()
+    second_path = _raw_file().write_table(_table(2))
+
+    assert first_path != second_path
+    assert staging.load_staged_table(first_path)['n'].to_pylist() == [1]
+
+
+def test_retried_run_reuses_files(monkeypatch, staging_dir):
+    """A retry of the flow run keeps its id and finds its staged files."""
+    monkeypatch.setenv(flow_run_env, 'retried-run')
+    _raw_file().write_table(_table(1))
+    assert _raw_file().is_fresh()
+
+
+def test_clean_file_dropped_when_raw_restaged(staging_dir):
+    """A clean file made from an older raw file is not reused."""
+    raw = _raw_file()
+    raw_path = raw.write_table(_table(1))
+    clean = staging.StagedFile('crimes_clean', raw_path)
+    clean.write_table(_table(1))
+    assert clean.is_fresh()
+
+    raw.write_table(_table(2))
+    stat = os.stat(raw_path)
+    os.utime(raw_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+    assert not clean.is_fresh()
+
+
+def test_old_files_not_reused(monkeypatch, staging_dir):
+    """Files older than the maximum age are staged again."""
+    monkeypatch.setattr(staging, 'staging_max_age', 0)
+    staged = _raw_file()
+    staged.write_table(_table(1))
+    assert not staged.is_fresh()
+
+
+def test_remove_drops_empty_run_directory(staging_dir):
+    """Run directory is removed with its last staged file."""
+    staged = _raw_file()
+    staged.write_table(_table(1))
+    staged.remove()
+    assert not os.listdir(staging_dir)
+
+
+def test_old_run_directories_purged(monkeypatch, staging_dir):
+    """Directories of old failed runs go when a new run starts staging."""
+    monkeypatch.setenv(flow_run_env, 'failed-run')
+    failed_path = _raw_file().write_table(_table(1))
+    monkeypatch.setenv(flow_run_env, 'recent-run')
+    recent_path = _raw_file().write_table(_table(2))
+    failed_dir = os.path.dirname(failed_path)
+    os.utime(failed_dir, (0, 0))
+
+    monkeypatch.setenv(flow_run_env, 'new-run')
+    _raw_file().write_table(_table(3))
+
+    assert not os.path.exists(failed_dir)
+    assert os.path.exists(recent_path)